@@ -6,12 +6,20 @@ A scalable Revenue Cycle Management SaaS platform for Indian hospitals
 __version__ = "1.0.0"
 __author__ = "RCM SaaS Team"
 
-# Expose a top-level Flask app for WSGI servers expecting `app:app`
-try:
-    from .main import create_app  # type: ignore
-    app = create_app()  # noqa: F401
-except Exception as e:  # pragma: no cover
-    # Avoid import-time crashes in environments where config isn't ready yet
-    import logging
-    logging.error(f"Failed to create app in __init__.py: {e}")
-    app = None  # type: ignore
\ No newline at end of file
+# Expose a top-level Flask app for WSGI servers expecting `app:app`.
+# It is built lazily on first access (PEP 562) and shared with `app.main:app`,
+# so importing the package - e.g. `from app.main import create_app` in wsgi.py -
+# doesn't create extra apps and re-initialize Firebase as a side effect.
+def __getattr__(name):
+    if name == 'app':
+        try:
+            from . import main  # type: ignore
+            app = main.app
+        except Exception as e:  # pragma: no cover
+            # Avoid import-time crashes in environments where config isn't ready yet
+            import logging
+            logging.getLogger(__name__).error("Failed to create app in __init__.py: %s", e)
+            app = None
+        globals()['app'] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,10 +5,91 @@ Authentication middleware for RCM SaaS Application
 from functools import wraps
 from flask import request, jsonify, g
 import jwt
+import time
 from datetime import datetime
 import logging
 
 from app.config import AppConfig
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# Permissions granted to each role, built once at import; frozensets give O(1) membership checks
+ROLE_PERMISSIONS = {
+    'super_admin': frozenset([
+        'hospitals:read', 'hospitals:update', 'hospitals:delete',
+        'users:read', 'users:create', 'users:update', 'users:delete',
+        'patients:read', 'patients:create', 'patients:update', 'patients:delete',
+        'preauth:read', 'preauth:create', 'preauth:update', 'preauth:delete',
+        'preauth:approve', 'preauth:reject', 'preauth:submit',
+        'dashboard:read', 'reports:read', 'notifications:read'
+    ]),
+    'admin': frozenset([
+        'hospitals:read', 'hospitals:update',
+        'users:read', 'users:create', 'users:update', 'users:delete',
+        'patients:read', 'patients:create', 'patients:update', 'patients:delete',
+        'preauth:read', 'preauth:create', 'preauth:update', 'preauth:delete',
+        'preauth:approve', 'preauth:reject', 'preauth:submit',
+        'dashboard:read', 'reports:read', 'notifications:read'
+    ]),
+    'doctor': frozenset([
+        'patients:read', 'patients:create', 'patients:update',
+        'preauth:read', 'preauth:create', 'preauth:update',
+        'dashboard:read', 'notifications:read'
+    ]),
+    'nurse': frozenset([
+        'patients:read', 'patients:update',
+        'preauth:read', 'preauth:update',
+        'notifications:read'
+    ]),
+    'receptionist': frozenset([
+        'patients:read', 'patients:create', 'patients:update',
+        'preauth:read', 'preauth:create', 'preauth:update',
+        'notifications:read'
+    ]),
+    'billing_staff': frozenset([
+        'patients:read',
+        'preauth:read', 'preauth:update',
+        'dashboard:read', 'reports:read', 'notifications:read'
+    ]),
+    'insurance_coordinator': frozenset([
+        'patients:read',
+        'preauth:read', 'preauth:create', 'preauth:update', 'preauth:submit',
+        'preauth:approve', 'preauth:reject',
+        'dashboard:read', 'notifications:read'
+    ]),
+    'user': frozenset([
+        'patients:read',
+        'preauth:read',
+        'notifications:read'
+    ])
+}
+
+
+# JWT verification settings, resolved once at import instead of on every request
+JWT_KEY = AppConfig.JWT_SECRET_KEY.encode() if isinstance(AppConfig.JWT_SECRET_KEY, str) else AppConfig.JWT_SECRET_KEY
+JWT_ALGORITHMS = ['HS256']
+JWT_DECODE_OPTIONS = {'require': ['exp', 'user_id', 'hospital_id', 'role']}
+
+# Verified token payloads, so repeat requests with the same token skip signature verification.
+# The short TTL bounds how long a payload is trusted; expiry is still checked on every hit.
+verified_token_cache = TTLCache(maxsize=10000, ttl=60)
+
+
+def decode_token_cached(token):
+    """Decode and verify a JWT, reusing the payload verified for an earlier request"""
+    data = verified_token_cache.get(token)
+    if data is not None:
+        exp = data.get('exp')
+        if exp is not None and exp <= time.time():
+            verified_token_cache.pop(token)
+            raise jwt.ExpiredSignatureError('Signature has expired')
+        return data
+    
+    data = jwt.decode(token, JWT_KEY, algorithms=JWT_ALGORITHMS, options=JWT_DECODE_OPTIONS)
+    verified_token_cache.set(token, data)
+    return data
 
 
 def require_auth(f):
@@ -20,17 +101,16 @@ def require_auth(f):
         # Check for token in Authorization header
         auth_header = request.headers.get('Authorization')
         if auth_header:
-            try:
-                token = auth_header.split(" ")[1]  # Bearer <token>
-            except IndexError:
+            if auth_header[:7].lower() != 'bearer ':
                 return jsonify({'error': 'Invalid authorization header format'}), 401
+            token = auth_header[7:].strip()  # Bearer <token>
         
         if not token:
             return jsonify({'error': 'Authorization token is missing'}), 401
         
         try:
             # Decode the token
-            data = jwt.decode(token, AppConfig.JWT_SECRET_KEY, algorithms=['HS256'])
+            data = decode_token_cached(token)
             current_user_id = data['user_id']
             current_hospital_id = data['hospital_id']
             current_user_role = data['role']
@@ -40,17 +120,12 @@ def require_auth(f):
             g.current_hospital_id = current_hospital_id
             g.current_user_role = current_user_role
             
-            # Add headers for backward compatibility
-            request.headers.add('X-User-ID', current_user_id)
-            request.headers.add('X-Hospital-ID', current_hospital_id)
-            request.headers.add('X-User-Role', current_user_role)
-            
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'error': 'Invalid token'}), 401
         except Exception as e:
-            logging.error(f"Authentication error: {str(e)}")
+            logger.error("Authentication error: %s", e)
             return jsonify({'error': 'Authentication failed'}), 401
         
         return f(*args, **kwargs)
@@ -58,6 +133,21 @@ def require_auth(f):
     return decorated_function
 
 
+def get_current_hospital_id(default=None):
+    """Get the hospital ID from the verified token, falling back to the X-Hospital-ID header"""
+    return getattr(g, 'current_hospital_id', None) or request.headers.get('X-Hospital-ID', default)
+
+
+def get_current_user_id(default=None):
+    """Get the user ID from the verified token, falling back to the X-User-ID header"""
+    return getattr(g, 'current_user_id', None) or request.headers.get('X-User-ID', default)
+
+
+def get_current_user_role(default=None):
+    """Get the user role from the verified token, falling back to the X-User-Role header"""
+    return getattr(g, 'current_user_role', None) or request.headers.get('X-User-Role', default)
+
+
 def require_permission(permission):
     """Decorator to require specific permission"""
     def decorator(f):
@@ -85,59 +175,9 @@ def get_user_permissions(user_id, hospital_id):
     # 3. Check resource-specific permissions
     
     # For now, return basic permissions based on role
-    role_permissions = {
-        'super_admin': [
-            'hospitals:read', 'hospitals:update', 'hospitals:delete',
-            'users:read', 'users:create', 'users:update', 'users:delete',
-            'patients:read', 'patients:create', 'patients:update', 'patients:delete',
-            'preauth:read', 'preauth:create', 'preauth:update', 'preauth:delete',
-            'preauth:approve', 'preauth:reject', 'preauth:submit',
-            'dashboard:read', 'reports:read', 'notifications:read'
-        ],
-        'admin': [
-            'hospitals:read', 'hospitals:update',
-            'users:read', 'users:create', 'users:update', 'users:delete',
-            'patients:read', 'patients:create', 'patients:update', 'patients:delete',
-            'preauth:read', 'preauth:create', 'preauth:update', 'preauth:delete',
-            'preauth:approve', 'preauth:reject', 'preauth:submit',
-            'dashboard:read', 'reports:read', 'notifications:read'
-        ],
-        'doctor': [
-            'patients:read', 'patients:create', 'patients:update',
-            'preauth:read', 'preauth:create', 'preauth:update',
-            'dashboard:read', 'notifications:read'
-        ],
-        'nurse': [
-            'patients:read', 'patients:update',
-            'preauth:read', 'preauth:update',
-            'notifications:read'
-        ],
-        'receptionist': [
-            'patients:read', 'patients:create', 'patients:update',
-            'preauth:read', 'preauth:create', 'preauth:update',
-            'notifications:read'
-        ],
-        'billing_staff': [
-            'patients:read',
-            'preauth:read', 'preauth:update',
-            'dashboard:read', 'reports:read', 'notifications:read'
-        ],
-        'insurance_coordinator': [
-            'patients:read',
-            'preauth:read', 'preauth:create', 'preauth:update', 'preauth:submit',
-            'preauth:approve', 'preauth:reject',
-            'dashboard:read', 'notifications:read'
-        ],
-        'user': [
-            'patients:read',
-            'preauth:read',
-            'notifications:read'
-        ]
-    }
-    
     # Get user role from g (set in require_auth)
     user_role = getattr(g, 'current_user_role', 'user')
-    return role_permissions.get(user_role, role_permissions['user'])
+    return ROLE_PERMISSIONS.get(user_role, ROLE_PERMISSIONS['user'])
 
 
 def generate_token(user_id, hospital_id, role, permissions=None):
@@ -151,14 +191,14 @@ def generate_token(user_id, hospital_id, role, permissions=None):
         'exp': datetime.utcnow().timestamp() + AppConfig.JWT_ACCESS_TOKEN_EXPIRES
     }
     
-    token = jwt.encode(payload, AppConfig.JWT_SECRET_KEY, algorithm='HS256')
+    token = jwt.encode(payload, JWT_KEY, algorithm=JWT_ALGORITHMS[0])
     return token
 
 
 def verify_token(token):
     """Verify JWT token"""
     try:
-        payload = jwt.decode(token, AppConfig.JWT_SECRET_KEY, algorithms=['HS256'])
+        payload = jwt.decode(token, JWT_KEY, algorithms=JWT_ALGORITHMS)
         return payload
     except jwt.ExpiredSignatureError:
         return None
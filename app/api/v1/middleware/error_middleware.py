@@ -4,8 +4,35 @@ Error handling middleware for RCM SaaS Application
 
 from flask import jsonify, request
 import logging
-import traceback
-from datetime import datetime
+
+from app.utils.helpers import utc_now_iso
+
+logger = logging.getLogger(__name__)
+
+
+_ERROR_DETAILS = {
+    400: ('Bad Request', 'The request could not be understood or was missing required parameters'),
+    401: ('Unauthorized', 'Authentication is required and has failed or has not been provided'),
+    403: ('Forbidden', 'The server understood the request but refuses to authorize it'),
+    404: ('Not Found', 'The requested resource was not found'),
+    405: ('Method Not Allowed', 'The method specified in the request is not allowed for the resource'),
+    409: ('Conflict', 'The request could not be completed due to a conflict with the current state of the resource'),
+    422: ('Unprocessable Entity', 'The request was well-formed but was unable to be followed due to semantic errors'),
+    429: ('Too Many Requests', 'Rate limit exceeded. Please try again later'),
+    500: ('Internal Server Error', 'An unexpected error occurred. Please try again later'),
+    503: ('Service Unavailable', 'The server is currently unable to handle the request due to temporary overload or maintenance'),
+}
+
+# Built once at import; only the timestamp is added per response
+_ERROR_BODIES = {
+    status_code: {'error': error, 'message': message, 'status_code': status_code}
+    for status_code, (error, message) in _ERROR_DETAILS.items()
+}
+
+
+def _error_response(status_code):
+    """Build a JSON error response from the prebuilt body for status_code"""
+    return jsonify({**_ERROR_BODIES[status_code], 'timestamp': utc_now_iso()}), status_code
 
 
 def handle_errors(app):
@@ -13,108 +40,51 @@ def handle_errors(app):
     
     @app.errorhandler(400)
     def bad_request(error):
-        return jsonify({
-            'error': 'Bad Request',
-            'message': 'The request could not be understood or was missing required parameters',
-            'status_code': 400,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 400
+        return _error_response(400)
     
     @app.errorhandler(401)
     def unauthorized(error):
-        return jsonify({
-            'error': 'Unauthorized',
-            'message': 'Authentication is required and has failed or has not been provided',
-            'status_code': 401,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 401
+        return _error_response(401)
     
     @app.errorhandler(403)
     def forbidden(error):
-        return jsonify({
-            'error': 'Forbidden',
-            'message': 'The server understood the request but refuses to authorize it',
-            'status_code': 403,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 403
+        return _error_response(403)
     
     @app.errorhandler(404)
     def not_found(error):
-        return jsonify({
-            'error': 'Not Found',
-            'message': 'The requested resource was not found',
-            'status_code': 404,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 404
+        return _error_response(404)
     
     @app.errorhandler(405)
     def method_not_allowed(error):
-        return jsonify({
-            'error': 'Method Not Allowed',
-            'message': 'The method specified in the request is not allowed for the resource',
-            'status_code': 405,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 405
+        return _error_response(405)
     
     @app.errorhandler(409)
     def conflict(error):
-        return jsonify({
-            'error': 'Conflict',
-            'message': 'The request could not be completed due to a conflict with the current state of the resource',
-            'status_code': 409,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 409
+        return _error_response(409)
     
     @app.errorhandler(422)
     def unprocessable_entity(error):
-        return jsonify({
-            'error': 'Unprocessable Entity',
-            'message': 'The request was well-formed but was unable to be followed due to semantic errors',
-            'status_code': 422,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 422
+        return _error_response(422)
     
     @app.errorhandler(429)
     def too_many_requests(error):
-        return jsonify({
-            'error': 'Too Many Requests',
-            'message': 'Rate limit exceeded. Please try again later',
-            'status_code': 429,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 429
+        return _error_response(429)
     
     @app.errorhandler(500)
     def internal_server_error(error):
-        logging.error(f"Internal Server Error: {str(error)}")
-        logging.error(traceback.format_exc())
+        logger.error("Internal Server Error: %s", error, exc_info=True)
         
-        return jsonify({
-            'error': 'Internal Server Error',
-            'message': 'An unexpected error occurred. Please try again later',
-            'status_code': 500,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+        return _error_response(500)
     
     @app.errorhandler(503)
     def service_unavailable(error):
-        return jsonify({
-            'error': 'Service Unavailable',
-            'message': 'The server is currently unable to handle the request due to temporary overload or maintenance',
-            'status_code': 503,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 503
+        return _error_response(503)
     
     @app.errorhandler(Exception)
     def handle_unexpected_error(error):
-        logging.error(f"Unexpected error: {str(error)}")
-        logging.error(traceback.format_exc())
+        logger.error("Unexpected error: %s", error, exc_info=True)
         
-        return jsonify({
-            'error': 'Internal Server Error',
-            'message': 'An unexpected error occurred. Please try again later',
-            'status_code': 500,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+        return _error_response(500)
 
 
 class APIException(Exception):
@@ -127,11 +97,12 @@ class APIException(Exception):
         self.payload = payload
     
     def to_dict(self):
-        rv = dict(self.payload or ())
-        rv['error'] = self.message
-        rv['status_code'] = self.status_code
-        rv['timestamp'] = datetime.utcnow().isoformat()
-        return rv
+        return {
+            **(self.payload or {}),
+            'error': self.message,
+            'status_code': self.status_code,
+            'timestamp': utc_now_iso()
+        }
 
 
 class ValidationError(APIException):
@@ -189,14 +160,14 @@ def log_error(error, context=None):
     error_info = {
         'error': str(error),
         'type': type(error).__name__,
-        'timestamp': datetime.utcnow().isoformat(),
+        'timestamp': utc_now_iso(),
         'request_url': request.url if request else None,
         'request_method': request.method if request else None,
         'user_agent': request.headers.get('User-Agent') if request else None,
         'context': context or {}
     }
     
-    logging.error(f"API Error: {error_info}")
+    logger.error("API Error: %s", error_info)
     
     if hasattr(error, '__traceback__'):
-        logging.error(traceback.format_exc())
+        logger.error("Traceback", exc_info=error)
@@ -3,82 +3,112 @@ Logging middleware for RCM SaaS Application
 """
 
 from functools import wraps
-from flask import request, g
+from flask import request, g, make_response
+from flask.logging import default_handler
+import atexit
 import logging
+import os
+import queue
 import time
-from datetime import datetime
-import json
+from logging.handlers import QueueHandler, QueueListener
+
+from app.utils.helpers import utc_now_iso
+from app.utils.json_provider import to_json
+
+logger = logging.getLogger(__name__)
+
+# Request body fields that are never written to the request log
+SENSITIVE_FIELDS = frozenset(['password', 'password_hash', 'token', 'secret', 'key'])
+
+# Request paths that are not written to the audit log
+NO_AUDIT_PATH_PREFIXES = ('/health', '/metrics', '/favicon.ico', '/static')
+
+# Longest X-Request-ID accepted from upstream before a new ID is generated instead
+MAX_REQUEST_ID_LENGTH = 128
+
+
+def generate_request_id():
+    """Generate a random 128-bit request ID as a hex string"""
+    return os.urandom(16).hex()
 
 
 def log_requests(f):
     """Decorator to log API requests"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Start timing
-        start_time = time.time()
+        # Start timing with the monotonic clock so wall-clock adjustments can't skew durations
+        start_ns = time.perf_counter_ns()
         
-        # Log request
         request_id = g.get('request_id', 'unknown')
-        user_id = getattr(g, 'current_user_id', 'anonymous')
-        hospital_id = getattr(g, 'current_hospital_id', 'unknown')
-        
-        request_log = {
-            'request_id': request_id,
-            'method': request.method,
-            'url': request.url,
-            'user_id': user_id,
-            'hospital_id': hospital_id,
-            'user_agent': request.headers.get('User-Agent', ''),
-            'ip_address': request.remote_addr,
-            'timestamp': datetime.utcnow().isoformat(),
-            'content_type': request.content_type,
-            'content_length': request.content_length
-        }
+        log_info = logger.isEnabledFor(logging.INFO)
         
-        # Log request body for non-GET requests (excluding sensitive data)
-        if request.method != 'GET' and request.is_json:
-            body = request.get_json()
-            # Remove sensitive fields
-            if isinstance(body, dict):
-                sensitive_fields = ['password', 'password_hash', 'token', 'secret', 'key']
-                filtered_body = {k: v for k, v in body.items() if k not in sensitive_fields}
-                request_log['request_body'] = filtered_body
-        
-        logging.info(f"API Request: {json.dumps(request_log)}")
+        # Log request
+        if log_info:
+            user_id = getattr(g, 'current_user_id', 'anonymous')
+            hospital_id = getattr(g, 'current_hospital_id', 'unknown')
+            
+            request_log = {
+                'request_id': request_id,
+                'method': request.method,
+                'url': request.url,
+                'user_id': user_id,
+                'hospital_id': hospital_id,
+                'user_agent': request.headers.get('User-Agent', ''),
+                'ip_address': request.remote_addr,
+                'timestamp': utc_now_iso(),
+                'content_type': request.content_type,
+                'content_length': request.content_length
+            }
+            
+            # Log request body for non-GET requests (excluding sensitive data)
+            if request.method != 'GET' and request.is_json:
+                body = request.get_json()
+                # Remove sensitive fields
+                if isinstance(body, dict):
+                    if not SENSITIVE_FIELDS.isdisjoint(body):
+                        body = {k: v for k, v in body.items() if k not in SENSITIVE_FIELDS}
+                    request_log['request_body'] = body
+            
+            logger.info("API Request: %s", to_json(request_log))
         
         # Execute the function
         try:
             response = f(*args, **kwargs)
+            if not log_info:
+                return response
+            
+            # Normalize the view's return value so the real status code is logged
+            response = make_response(response)
             
             # Calculate response time
-            response_time = time.time() - start_time
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 10_000 / 100
             
             # Log response
             response_log = {
                 'request_id': request_id,
-                'status_code': response[1] if isinstance(response, tuple) else 200,
-                'response_time_ms': round(response_time * 1000, 2),
-                'timestamp': datetime.utcnow().isoformat()
+                'status_code': response.status_code,
+                'response_time_ms': response_time_ms,
+                'timestamp': utc_now_iso()
             }
             
-            logging.info(f"API Response: {json.dumps(response_log)}")
+            logger.info("API Response: %s", to_json(response_log))
             
             return response
             
         except Exception as e:
             # Calculate response time
-            response_time = time.time() - start_time
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 10_000 / 100
             
             # Log error
             error_log = {
                 'request_id': request_id,
                 'error': str(e),
                 'error_type': type(e).__name__,
-                'response_time_ms': round(response_time * 1000, 2),
-                'timestamp': datetime.utcnow().isoformat()
+                'response_time_ms': response_time_ms,
+                'timestamp': utc_now_iso()
             }
             
-            logging.error(f"API Error: {json.dumps(error_log)}")
+            logger.error("API Error: %s", to_json(error_log))
             
             raise
     
@@ -87,6 +117,9 @@ def log_requests(f):
 
 def log_audit_event(action, resource_type, resource_id, old_values=None, new_values=None, metadata=None):
     """Log audit event"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     user_id = getattr(g, 'current_user_id', 'system')
     hospital_id = getattr(g, 'current_hospital_id', 'unknown')
     request_id = g.get('request_id', 'unknown')
@@ -103,10 +136,10 @@ def log_audit_event(action, resource_type, resource_id, old_values=None, new_val
         'metadata': metadata or {},
         'ip_address': request.remote_addr,
         'user_agent': request.headers.get('User-Agent', ''),
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utc_now_iso()
     }
     
-    logging.info(f"Audit Event: {json.dumps(audit_log)}")
+    logger.info("Audit Event: %s", to_json(audit_log))
 
 
 def log_security_event(event_type, description, severity='medium', metadata=None):
@@ -125,17 +158,20 @@ def log_security_event(event_type, description, severity='medium', metadata=None
         'metadata': metadata or {},
         'ip_address': request.remote_addr,
         'user_agent': request.headers.get('User-Agent', ''),
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utc_now_iso()
     }
     
     if severity == 'high' or severity == 'critical':
-        logging.error(f"Security Event: {json.dumps(security_log)}")
+        logger.error("Security Event: %s", to_json(security_log))
     else:
-        logging.warning(f"Security Event: {json.dumps(security_log)}")
+        logger.warning("Security Event: %s", to_json(security_log))
 
 
 def log_performance_metric(metric_name, value, unit='ms', metadata=None):
     """Log performance metric"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     user_id = getattr(g, 'current_user_id', 'system')
     hospital_id = getattr(g, 'current_hospital_id', 'unknown')
     request_id = g.get('request_id', 'unknown')
@@ -148,14 +184,17 @@ def log_performance_metric(metric_name, value, unit='ms', metadata=None):
         'value': value,
         'unit': unit,
         'metadata': metadata or {},
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utc_now_iso()
     }
     
-    logging.info(f"Performance Metric: {json.dumps(performance_log)}")
+    logger.info("Performance Metric: %s", to_json(performance_log))
 
 
 def log_business_event(event_type, description, data=None):
     """Log business event"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     user_id = getattr(g, 'current_user_id', 'system')
     hospital_id = getattr(g, 'current_hospital_id', 'unknown')
     request_id = g.get('request_id', 'unknown')
@@ -167,18 +206,79 @@ def log_business_event(event_type, description, data=None):
         'event_type': event_type,
         'description': description,
         'data': data or {},
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utc_now_iso()
     }
     
-    logging.info(f"Business Event: {json.dumps(business_log)}")
+    logger.info("Business Event: %s", to_json(business_log))
+
+
+# Listener draining the root logger's queue; replaced whenever logging is reconfigured
+_queue_listener = None
+
+
+def start_queue_logging(handlers, level):
+    """Route all logging through one queue on the root logger, emitted to handlers by a listener thread.
+    
+    Handlers already on the root logger (such as the stderr handler ``logging.basicConfig``
+    adds on the first module-level ``logging`` call) and any earlier listener are replaced,
+    so calling this again reconfigures logging instead of duplicating output.
+    """
+    global _queue_listener
+    
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+    
+    root_logger.setLevel(level)
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    
+    _queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+    return _queue_listener
+
+
+def _stop_queue_logging():
+    if _queue_listener is not None:
+        _queue_listener.stop()
+
+
+atexit.register(_stop_queue_logging)
+
+
+def register_request_id(app):
+    """Give each request an ID, reusing an upstream X-Request-ID, and echo it on the response"""
+    
+    @app.before_request
+    def add_request_id():
+        # Reuse the ID from an upstream proxy so one request can be traced across services
+        request_id = request.headers.get('X-Request-ID')
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = generate_request_id()
+        g.request_id = request_id
+    
+    @app.after_request
+    def return_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
 
 
 def setup_logging(app):
     """Setup logging configuration for the application"""
     
     # Configure logging level
-    log_level = app.config.get('LOG_LEVEL', 'INFO')
-    app.logger.setLevel(getattr(logging, log_level.upper()))
+    log_level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO').upper())
+    app.logger.setLevel(log_level)
+    # app.logger propagates to the root handlers below; Flask's own stderr handler would duplicate them
+    app.logger.removeHandler(default_handler)
     
     # Create formatter
     formatter = logging.Formatter(
@@ -189,7 +289,7 @@ def setup_logging(app):
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    app.logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # Add file handler if log file is specified
     log_file = app.config.get('LOG_FILE')
@@ -197,25 +297,26 @@ def setup_logging(app):
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(logging.INFO)
         file_handler.setFormatter(formatter)
-        app.logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    # Write records from a background thread so requests never block on log I/O
+    start_queue_logging(handlers, log_level)
     
     # Add request ID to all log messages
-    @app.before_request
-    def add_request_id():
-        import uuid
-        g.request_id = str(uuid.uuid4())
+    register_request_id(app)
     
     # Log all requests
     @app.before_request
     def log_request():
-        if not request.path.startswith('/health'):
-            log_audit_event(
-                action='request',
-                resource_type='api',
-                resource_id=request.endpoint or 'unknown',
-                metadata={
-                    'method': request.method,
-                    'url': request.url,
-                    'endpoint': request.endpoint
-                }
-            )
+        if request.path.startswith(NO_AUDIT_PATH_PREFIXES):
+            return
+        log_audit_event(
+            action='request',
+            resource_type='api',
+            resource_id=request.endpoint or 'unknown',
+            metadata={
+                'method': request.method,
+                'url': request.url,
+                'endpoint': request.endpoint
+            }
+        )
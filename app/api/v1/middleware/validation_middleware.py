@@ -5,28 +5,45 @@ Validation middleware for RCM SaaS Application
 from functools import wraps
 from flask import request, jsonify
 import jsonschema
-from jsonschema import validate, ValidationError
+from jsonschema.exceptions import best_match
 import logging
+import re
+
+
+_EMPTY_VALUES = (None, '')
+
+
+def _get_json_body():
+    """Get the parsed JSON body, reusing it when a stacked decorator already validated it"""
+    data = getattr(request, 'validated_data', None)
+    if data is not None:
+        return data, None
+    
+    if not request.is_json:
+        return None, (jsonify({'error': 'Request must be JSON'}), 400)
+    
+    data = request.get_json()
+    if not data:
+        return None, (jsonify({'error': 'Request body is empty'}), 400)
+    
+    return data, None
 
 
 def validate_json(required_fields=None):
     """Decorator to validate JSON request data"""
+    required = tuple(required_fields or ())
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not request.is_json:
-                return jsonify({'error': 'Request must be JSON'}), 400
+            data, error_response = _get_json_body()
+            if error_response:
+                return error_response
             
-            data = request.get_json()
-            if not data:
-                return jsonify({'error': 'Request body is empty'}), 400
-            
-            # Check required fields
-            if required_fields:
-                missing_fields = []
-                for field in required_fields:
-                    if field not in data or data[field] is None or data[field] == '':
-                        missing_fields.append(field)
+            # Check required fields; missing, None and '' values all count as missing
+            if required:
+                get_value = data.get if isinstance(data, dict) else {}.get
+                missing_fields = [field for field in required if get_value(field) in _EMPTY_VALUES]
                 
                 if missing_fields:
                     return jsonify({
@@ -44,19 +61,20 @@ def validate_json(required_fields=None):
 
 def validate_request(schema):
     """Decorator to validate request against JSON schema"""
+    # Check the schema and build its validator once, not on every request
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not request.is_json:
-                return jsonify({'error': 'Request must be JSON'}), 400
+            data, error_response = _get_json_body()
+            if error_response:
+                return error_response
             
-            data = request.get_json()
-            if not data:
-                return jsonify({'error': 'Request body is empty'}), 400
-            
-            try:
-                validate(instance=data, schema=schema)
-            except ValidationError as e:
+            e = best_match(validator.iter_errors(data))
+            if e is not None:
                 return jsonify({
                     'error': 'Validation failed',
                     'details': e.message,
@@ -186,37 +204,70 @@ def validate_date_range(date_from, date_to):
     """Validate date range parameters"""
     from datetime import datetime
     
+    parsed_from = parsed_to = None
+    
     if date_from:
         try:
-            datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+            parsed_from = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
         except ValueError:
             return False, "Invalid date_from format"
     
     if date_to:
         try:
-            datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+            parsed_to = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
         except ValueError:
             return False, "Invalid date_to format"
     
-    if date_from and date_to:
-        if datetime.fromisoformat(date_from.replace('Z', '+00:00')) > datetime.fromisoformat(date_to.replace('Z', '+00:00')):
+    if parsed_from and parsed_to:
+        if parsed_from > parsed_to:
             return False, "date_from cannot be greater than date_to"
     
     return True, None
 
 
+# Basic XSS prevention - script tags, javascript: URLs and inline event handlers.
+# Applied in order, as removing one match can expose another.
+_SANITIZE_PATTERNS = (
+    re.compile(r'<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>', re.IGNORECASE),
+    re.compile(r'javascript:', re.IGNORECASE),
+    re.compile(r'on\w+\s*=', re.IGNORECASE),
+)
+
+
+def _sanitize_str(value):
+    """Strip dangerous markup from a single string"""
+    # Every pattern needs one of these characters, so most values skip the regexes
+    if '<' in value or ':' in value or '=' in value:
+        for pattern in _SANITIZE_PATTERNS:
+            value = pattern.sub('', value)
+    return value.strip()
+
+
+def _empty_copy(container):
+    """Create an empty dict or a list of the same length to fill with sanitized values"""
+    return {} if isinstance(container, dict) else [None] * len(container)
+
+
 def sanitize_input(data):
     """Sanitize input data to prevent XSS and other attacks"""
-    if isinstance(data, dict):
-        return {key: sanitize_input(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [sanitize_input(item) for item in data]
-    elif isinstance(data, str):
-        # Basic XSS prevention - remove script tags and dangerous characters
-        import re
-        data = re.sub(r'<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>', '', data, flags=re.IGNORECASE)
-        data = re.sub(r'javascript:', '', data, flags=re.IGNORECASE)
-        data = re.sub(r'on\w+\s*=', '', data, flags=re.IGNORECASE)
-        return data.strip()
-    else:
+    if isinstance(data, str):
+        return _sanitize_str(data)
+    if not isinstance(data, (dict, list)):
         return data
+    
+    # Walk nested payloads with an explicit stack of (source, copy) pairs instead of recursing
+    result = _empty_copy(data)
+    stack = [(data, result)]
+    while stack:
+        source, target = stack.pop()
+        items = source.items() if isinstance(source, dict) else enumerate(source)
+        for key, value in items:
+            if isinstance(value, str):
+                target[key] = _sanitize_str(value)
+            elif isinstance(value, (dict, list)):
+                target[key] = _empty_copy(value)
+                stack.append((value, target[key]))
+            else:
+                target[key] = value
+    
+    return result
@@ -2,89 +2,140 @@
 API v1 routes module for RCM SaaS Application
 """
 
-from flask import Blueprint, jsonify
-from .patients import patients_bp
-from .claims import claims_bp
-from .health import health_bp
-from .preauthprocess import preauthprocess_bp
+import hashlib
+import importlib
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+from flask import Blueprint, current_app, request
+
+from app.utils.helpers import etag_matches
+
+
+class LazyBlueprint(Blueprint):
+    """Blueprint that imports its child blueprints only when it is registered on an app"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lazy_blueprints = []
+    
+    def register_lazy(self, module_name, attribute, url_prefix):
+        """Register a child blueprint by module (relative to this package) and attribute name"""
+        self._lazy_blueprints.append((module_name, attribute, url_prefix))
+    
+    def register(self, app, options):
+        # Child blueprints must be attached before the first registration finishes setup
+        while self._lazy_blueprints:
+            module_name, attribute, url_prefix = self._lazy_blueprints.pop(0)
+            blueprint = getattr(importlib.import_module(module_name, self.import_name), attribute)
+            self.register_blueprint(blueprint, url_prefix=url_prefix)
+        super().register(app, options)
+
 
 # Create main v1 blueprint
-v1_bp = Blueprint('v1', __name__)
+v1_bp = LazyBlueprint('v1', __name__)
 
-# Register route blueprints
-v1_bp.register_blueprint(patients_bp, url_prefix='/patients')
-v1_bp.register_blueprint(claims_bp, url_prefix='/claims')
-v1_bp.register_blueprint(health_bp, url_prefix='/health')
-v1_bp.register_blueprint(preauthprocess_bp, url_prefix='/preauth-process')
+# Route blueprints as (module, blueprint attribute, URL prefix)
+ROUTE_BLUEPRINTS = (
+    ('.patients', 'patients_bp', '/patients'),
+    ('.claims', 'claims_bp', '/claims'),
+    ('.health', 'health_bp', '/health'),
+    ('.preauthprocess', 'preauthprocess_bp', '/preauth-process'),
+)
 
-# API Documentation endpoint
-@v1_bp.route('/', methods=['GET'])
-def api_documentation():
-    """API v1 documentation endpoint"""
-    return jsonify({
-        'message': 'RCM SaaS Application API v1',
-        'version': '1.0.0',
-        'status': 'active',
-        'endpoints': {
-            'patients': {
-                'base_url': '/api/v1/patients',
-                'methods': {
-                    'POST /': 'Create a new patient',
-                    'GET /': 'Get all patients (with pagination)',
-                    'GET /<uhid>': 'Get patient by UHID',
-                    'GET /search/mobile/<mobile>': 'Search patient by mobile number',
-                    'GET /states': 'Get list of Indian states',
-                    'GET /pincode/<pincode>': 'Get state and city from pincode',
-                    'GET /payers': 'Get list of payers',
-                    'GET /corporates': 'Get list of corporate clients'
-                }
-            },
-            'claims': {
-                'base_url': '/api/v1/claims',
-                'methods': {
-                    'POST /': 'Create a new claim draft',
-                    'GET /': 'Get all claims (with pagination and filtering)',
-                    'GET /<claim_id>': 'Get claim by ID',
-                    'PUT /<claim_id>': 'Update claim draft',
-                    'POST /submit/<claim_id>': 'Submit claim for processing',
-                    'GET /specialities': 'Get all available specialities',
-                    'GET /doctors': 'Get doctors by hospital and speciality',
-                    'GET /doctor-details/<doctor_id>': 'Get doctor details by ID',
-                    'GET /payers': 'Get list of payers'
-                }
-            },
-            'health': {
-                'base_url': '/health',
-                'methods': {
-                    'GET /': 'Health check endpoint'
-                }
-            },
-            'preauth-process': {
-                'base_url': '/api/v1/preauth-process',
-                'methods': {
-                    'POST /submit': 'Submit a new preauth request (starts with Preauth Registered status)',
-                    'PUT /update-status': 'Update preauth status based on user role',
-                    'GET /status-history/<preauth_id>': 'Get status history for a preauth request',
-                    'GET /current-status/<preauth_id>': 'Get current status and allowed transitions',
-                    'GET /list': 'List preauth requests with filtering options',
-                    'POST /submit-discharge': 'Submit discharge information for approved preauth'
-                },
-                'roles': {
-                    'preauth_executive': 'Can transition: Preauth Registered -> Need More Info/Preauth Approved/Preauth Denial, Need More Info -> Info Submitted, Discharge Submitted -> Discharge NMI/Discharge Approved/Discharge Denial, Discharge NMI -> Discharge NMI Submitted',
-                    'processor': 'Can transition: Preauth Registered -> Need More Info/Preauth Approved/Preauth Denial, Discharge Submitted -> Discharge NMI/Discharge Approved/Discharge Denial'
-                }
+# Register route blueprints; their modules are imported when v1_bp is registered on the app
+for module_name, attribute, url_prefix in ROUTE_BLUEPRINTS:
+    v1_bp.register_lazy(module_name, attribute, url_prefix)
+
+# API documentation, serialized once at import since it never changes
+API_DOCUMENTATION = {
+    'message': 'RCM SaaS Application API v1',
+    'version': '1.0.0',
+    'status': 'active',
+    'endpoints': {
+        'patients': {
+            'base_url': '/api/v1/patients',
+            'methods': {
+                'POST /': 'Create a new patient',
+                'GET /': 'Get all patients (with pagination)',
+                'GET /<uhid>': 'Get patient by UHID',
+                'GET /search/mobile/<mobile>': 'Search patient by mobile number',
+                'GET /states': 'Get list of Indian states',
+                'GET /pincode/<pincode>': 'Get state and city from pincode',
+                'GET /payers': 'Get list of payers',
+                'GET /corporates': 'Get list of corporate clients'
             }
         },
-        'authentication': {
-            'note': 'Authentication middleware is currently disabled for development',
-            'headers': {
-                'X-Hospital-ID': 'Required for most endpoints',
-                'X-User-ID': 'User identifier for audit logging',
-                'X-User-Name': 'User name for audit logging'
+        'claims': {
+            'base_url': '/api/v1/claims',
+            'methods': {
+                'POST /': 'Create a new claim draft',
+                'GET /': 'Get all claims (with pagination and filtering)',
+                'GET /<claim_id>': 'Get claim by ID',
+                'PUT /<claim_id>': 'Update claim draft',
+                'POST /submit/<claim_id>': 'Submit claim for processing',
+                'GET /specialities': 'Get all available specialities',
+                'GET /doctors': 'Get doctors by hospital and speciality',
+                'GET /doctor-details/<doctor_id>': 'Get doctor details by ID',
+                'GET /payers': 'Get list of payers'
             }
         },
-        'documentation': {
-            'swagger': 'Coming soon',
-            'postman_collection': 'Coming soon'
+        'health': {
+            'base_url': '/health',
+            'methods': {
+                'GET /': 'Health check endpoint'
+            }
+        },
+        'preauth-process': {
+            'base_url': '/api/v1/preauth-process',
+            'methods': {
+                'POST /submit': 'Submit a new preauth request (starts with Preauth Registered status)',
+                'PUT /update-status': 'Update preauth status based on user role',
+                'GET /status-history/<preauth_id>': 'Get status history for a preauth request',
+                'GET /current-status/<preauth_id>': 'Get current status and allowed transitions',
+                'GET /list': 'List preauth requests with filtering options',
+                'POST /submit-discharge': 'Submit discharge information for approved preauth'
+            },
+            'roles': {
+                'preauth_executive': 'Can transition: Preauth Registered -> Need More Info/Preauth Approved/Preauth Denial, Need More Info -> Info Submitted, Discharge Submitted -> Discharge NMI/Discharge Approved/Discharge Denial, Discharge NMI -> Discharge NMI Submitted',
+                'processor': 'Can transition: Preauth Registered -> Need More Info/Preauth Approved/Preauth Denial, Discharge Submitted -> Discharge NMI/Discharge Approved/Discharge Denial'
+            }
         }
-    }), 200
+    },
+    'authentication': {
+        'note': 'Authentication middleware is currently disabled for development',
+        'headers': {
+            'X-Hospital-ID': 'Required for most endpoints',
+            'X-User-ID': 'User identifier for audit logging',
+            'X-User-Name': 'User name for audit logging'
+        }
+    },
+    'documentation': {
+        'swagger': 'Coming soon',
+        'postman_collection': 'Coming soon'
+    }
+}
+
+if orjson is not None:
+    _API_DOCUMENTATION_BODY = orjson.dumps(API_DOCUMENTATION, option=orjson.OPT_SORT_KEYS) + b'\n'
+else:
+    _API_DOCUMENTATION_BODY = json.dumps(API_DOCUMENTATION, separators=(',', ':'), sort_keys=True).encode() + b'\n'
+
+_API_DOCUMENTATION_ETAG = hashlib.blake2b(_API_DOCUMENTATION_BODY, digest_size=16).hexdigest()
+
+
+# API Documentation endpoint
+@v1_bp.route('/', methods=['GET'])
+def api_documentation():
+    """API v1 documentation endpoint"""
+    if etag_matches(request.if_none_match, _API_DOCUMENTATION_ETAG):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(_API_DOCUMENTATION_BODY, status=200, mimetype='application/json')
+    response.set_etag(_API_DOCUMENTATION_ETAG, weak=True)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
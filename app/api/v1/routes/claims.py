@@ -2,8 +2,10 @@
 Claim routes for RCM SaaS Application
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, current_app, make_response
+from firebase_admin import firestore
 from datetime import datetime, date
+import copy
 import uuid
 import requests
 from typing import Dict, Any, List, Optional
@@ -14,12 +16,18 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from app.api.v1.middleware.auth_middleware import require_auth, require_permission
+from app.api.v1.middleware.auth_middleware import (
+    require_auth, require_permission, get_current_hospital_id, get_current_user_id
+)
 from app.api.v1.middleware.validation_middleware import validate_json
-from app.database.firebase_client import FirebaseClient
+from app.database.firebase_client import get_firebase_client
 from app.database.models.claim import Claim
 from app.utils.validators import validate_indian_phone_number, validate_email, validate_pincode
-from app.utils.helpers import generate_claim_id, calculate_age_detailed
+from app.utils.background import run_in_background
+from app.utils.helpers import generate_claim_id, calculate_age_detailed, group_by_key, generate_etag, etag_matches
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 claims_bp = Blueprint('claims', __name__)
 
@@ -27,11 +35,32 @@ claims_bp = Blueprint('claims', __name__)
 firebase_client = None
 db = None
 
+# Specialities and doctors change rarely, so cache their encoded responses per process
+reference_data_cache = TTLCache(maxsize=256, ttl=300)
+
+# Hospital documents looked up by ID, shared across requests
+hospital_info_cache = TTLCache(maxsize=512, ttl=600)
+
+# Allowed values for enumerated claim fields
+VALID_CLAIM_TYPES = ('IP', 'OP', 'Day care')
+VALID_ADMISSION_TYPES = ('Planned', 'Emergency')
+VALID_PAYER_TYPES = ('TPA', 'Insurer', 'Corporate', 'Social schemes', 'Others')
+VALID_WARD_TYPES = ('Single room', 'Twin sharing', 'ICU', '3 or more beds')
+VALID_DAYCARE_TYPES = ('Dialysis', 'Chemotherapy', 'Radiotherapy', 'Other procedures')
+VALID_NATURE_TYPES = ('Disease', 'Injury')
+VALID_CAUSE_TYPES = ('Substance Abuse', 'Accident', 'Negligence')
+VALID_TREATMENT_TYPES = ('Medical Management', 'Surgical management', 'Intensive care', 'Investigation', 'Non-allopathic')
+VALID_ROUTE_TYPES = ('IV', 'Oral', 'Others')
+VALID_OCCUPATIONS = ('Service', 'Self employed', 'Retired', 'Business owner')
+
+# Fields that must be filled before a claim can be submitted
+SUBMISSION_REQUIRED_FIELDS = ('gender', 'date_of_birth', 'address', 'city', 'state', 'pincode')
+
 def get_db():
     """Get Firestore database client"""
     global db, firebase_client
     if db is None:
-        firebase_client = FirebaseClient()
+        firebase_client = get_firebase_client()
         if firebase_client.is_initialized():
             db = firebase_client.get_firestore_client()
         else:
@@ -40,6 +69,15 @@ def get_db():
     return db
 
 
+def get_document_cached(collection: str, doc_id: str):
+    """Get a document snapshot by ID, memoized for the rest of the current request"""
+    cache = g.setdefault('_firestore_doc_cache', {})
+    key = (collection, doc_id)
+    if key not in cache:
+        cache[key] = get_db().collection(collection).document(doc_id).get()
+    return cache[key]
+
+
 @claims_bp.route('/', methods=['POST'])
 # @require_auth
 # @require_permission('claims:create')
@@ -47,8 +85,8 @@ def get_db():
 def create_claim_draft():
     """Create a new claim draft with mandatory fields"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_id = request.headers.get('X-User-ID', 'test_user')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_id = get_current_user_id('test_user')
         user_name = request.headers.get('X-User-Name', 'Test User')
         data = request.get_json()
         
@@ -136,7 +174,7 @@ def create_claim_draft():
         }), 201
         
     except Exception as e:
-        logging.error(f"Error creating claim draft: {str(e)}")
+        logger.error("Error creating claim draft: %s", e)
         return jsonify({
             'error': 'Internal server error',
             'message': 'Failed to create claim draft'
@@ -160,24 +198,32 @@ def get_specialities():
             }), 200
         
         # Firebase is available, use real data
-        specialities_ref = db.collection('specialities')
-        specialities = list(specialities_ref.where('is_active', '==', True).stream())
-        
-        specialities_list = []
-        for speciality_doc in specialities:
-            speciality_data = speciality_doc.to_dict()
-            specialities_list.append({
-                'id': speciality_data.get('id'),
-                'name': speciality_data.get('name'),
-                'description': speciality_data.get('description')
-            })
+        body = reference_data_cache.get('specialities')
+        if body is None:
+            specialities_ref = db.collection('specialities')
+            query = specialities_ref.where('is_active', '==', True)
+            
+            # Only fetch the fields the response uses
+            query = query.select(['id', 'name', 'description'])
+            specialities = list(query.stream())
+            
+            specialities_list = []
+            for speciality_doc in specialities:
+                speciality_data = speciality_doc.to_dict()
+                specialities_list.append({
+                    'id': speciality_data.get('id'),
+                    'name': speciality_data.get('name'),
+                    'description': speciality_data.get('description')
+                })
+            
+            # Cache the encoded body so cache hits skip JSON serialization
+            body = current_app.json.dumps({'specialities': specialities_list})
+            reference_data_cache.set('specialities', body)
         
-        return jsonify({
-            'specialities': specialities_list
-        }), 200
+        return current_app.response_class(body, mimetype='application/json'), 200
         
     except Exception as e:
-        logging.error(f"Error fetching specialities: {str(e)}")
+        logger.error("Error fetching specialities: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -187,8 +233,9 @@ def get_specialities():
 def get_doctors():
     """Get doctors filtered by hospital and speciality"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID')
+        hospital_id = get_current_hospital_id()
         speciality_id = request.args.get('speciality_id')
+        group_by_speciality = request.args.get('group_by') == 'speciality'
         
         if not hospital_id:
             return jsonify({'error': 'Hospital ID is required'}), 400
@@ -203,41 +250,61 @@ def get_doctors():
             if speciality_id:
                 mock_doctors = [d for d in mock_doctors if d.get('speciality_id') == speciality_id]
             
+            if group_by_speciality:
+                return jsonify({
+                    'doctors_by_speciality': group_by_key(mock_doctors, 'speciality_id'),
+                    'note': 'Using mock data - Firebase not available'
+                }), 200
+            
             return jsonify({
                 'doctors': mock_doctors,
                 'note': 'Using mock data - Firebase not available'
             }), 200
         
         # Firebase is available, use real data
-        doctors_ref = db.collection('doctors')
-        
-        # Filter by hospital
-        query = doctors_ref.where('hospital_id', '==', hospital_id).where('is_active', '==', True)
-        
-        # Filter by speciality if provided
-        if speciality_id:
-            query = query.where('speciality_id', '==', speciality_id)
-        
-        doctors = list(query.stream())
-        
-        doctors_list = []
-        for doctor_doc in doctors:
-            doctor_data = doctor_doc.to_dict()
-            doctors_list.append({
-                'id': doctor_data.get('id'),
-                'name': doctor_data.get('name'),
-                'contact': doctor_data.get('contact'),
-                'qualification': doctor_data.get('qualification'),
-                'registration_number': doctor_data.get('registration_number'),
-                'speciality_id': doctor_data.get('speciality_id')
-            })
+        cache_key = ('doctors', hospital_id, speciality_id, group_by_speciality)
+        body = reference_data_cache.get(cache_key)
+        if body is None:
+            doctors_ref = db.collection('doctors')
+            
+            # Filter by hospital
+            query = doctors_ref.where('hospital_id', '==', hospital_id).where('is_active', '==', True)
+            
+            # Filter by speciality if provided
+            if speciality_id:
+                query = query.where('speciality_id', '==', speciality_id)
+            
+            # Only fetch the fields the response uses
+            query = query.select(['id', 'name', 'contact', 'qualification', 'registration_number', 'speciality_id'])
+            
+            doctors = list(query.stream())
+            
+            doctors_list = []
+            for doctor_doc in doctors:
+                doctor_data = doctor_doc.to_dict()
+                doctors_list.append({
+                    'id': doctor_data.get('id'),
+                    'name': doctor_data.get('name'),
+                    'contact': doctor_data.get('contact'),
+                    'qualification': doctor_data.get('qualification'),
+                    'registration_number': doctor_data.get('registration_number'),
+                    'speciality_id': doctor_data.get('speciality_id')
+                })
+            
+            # Grouped output lets clients switch speciality with a lookup instead of a rescan
+            if group_by_speciality:
+                payload = {'doctors_by_speciality': group_by_key(doctors_list, 'speciality_id')}
+            else:
+                payload = {'doctors': doctors_list}
+            
+            # Cache the encoded body so cache hits skip JSON serialization
+            body = current_app.json.dumps(payload)
+            reference_data_cache.set(cache_key, body)
         
-        return jsonify({
-            'doctors': doctors_list
-        }), 200
+        return current_app.response_class(body, mimetype='application/json'), 200
         
     except Exception as e:
-        logging.error(f"Error fetching doctors: {str(e)}")
+        logger.error("Error fetching doctors: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -247,8 +314,8 @@ def get_doctors():
 def update_claim_draft(claim_id):
     """Update claim draft with optional fields"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_id = request.headers.get('X-User-ID', 'test_user')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_id = get_current_user_id('test_user')
         user_name = request.headers.get('X-User-Name', 'Test User')
         data = request.get_json()
         
@@ -387,7 +454,7 @@ def update_claim_draft(claim_id):
         }), 200
         
     except Exception as e:
-        logging.error(f"Error updating claim draft: {str(e)}")
+        logger.error("Error updating claim draft: %s", e)
         return jsonify({
             'error': 'Internal server error',
             'message': 'Failed to update claim draft'
@@ -400,14 +467,12 @@ def update_claim_draft(claim_id):
 def get_doctor_details(doctor_id):
     """Get doctor details by ID for auto-population"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID')
+        hospital_id = get_current_hospital_id()
         
         if not hospital_id:
             return jsonify({'error': 'Hospital ID is required'}), 400
         
-        db = get_db()
-        doctor_ref = db.collection('doctors').document(doctor_id)
-        doctor_doc = doctor_ref.get()
+        doctor_doc = get_document_cached('doctors', doctor_id)
         
         if not doctor_doc.exists:
             return jsonify({'error': 'Doctor not found'}), 404
@@ -422,8 +487,7 @@ def get_doctor_details(doctor_id):
         speciality_id = doctor_data.get('speciality_id')
         speciality_name = 'Unknown'
         if speciality_id:
-            speciality_ref = db.collection('specialities').document(speciality_id)
-            speciality_doc = speciality_ref.get()
+            speciality_doc = get_document_cached('specialities', speciality_id)
             if speciality_doc.exists:
                 speciality_data = speciality_doc.to_dict()
                 speciality_name = speciality_data.get('name', 'Unknown')
@@ -441,7 +505,7 @@ def get_doctor_details(doctor_id):
         }), 200
         
     except Exception as e:
-        logging.error(f"Error fetching doctor details: {str(e)}")
+        logger.error("Error fetching doctor details: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -459,14 +523,24 @@ def get_claim(claim_id):
         if not claim_doc.exists:
             return jsonify({'error': 'Claim not found'}), 404
         
+        # Unchanged claims are answered with 304 instead of the full document
+        etag = generate_etag(claim_id, claim_doc.update_time)
+        if etag_matches(request.if_none_match, etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            return response
+        
         claim_data = claim_doc.to_dict()
         
-        return jsonify({
+        response = jsonify({
             'claim': claim_data
-        }), 200
+        })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response, 200
         
     except Exception as e:
-        logging.error(f"Error getting claim: {str(e)}")
+        logger.error("Error getting claim: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -476,9 +550,9 @@ def get_claim(claim_id):
 def get_claims():
     """Get all claims with pagination and filtering"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        hospital_id = get_current_hospital_id('HOSP_001')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
         status = request.args.get('status', '')
         claim_type = request.args.get('claim_type', '')
         search = request.args.get('search', '')
@@ -530,16 +604,15 @@ def get_claims():
         if claim_type:
             query = query.where('claim_type', '==', claim_type)
         
-        # Get total count
-        total_docs = list(query.stream())
-        total_count = len(total_docs)
+        # Get total count with a server-side aggregation instead of streaming every document
+        total_count = query.count().get()[0][0].value
         
         # Apply pagination
         start_index = (page - 1) * per_page
         end_index = start_index + per_page
         
-        # Get paginated results
-        paginated_docs = total_docs[start_index:end_index]
+        # Get paginated results - only the requested page is fetched
+        paginated_docs = query.offset(start_index).limit(per_page).stream()
         
         claims = []
         for doc in paginated_docs:
@@ -563,10 +636,8 @@ def get_claims():
         
     except Exception as e:
         error_msg = str(e)
-        logging.error(f"Error getting claims: {error_msg}")
-        logging.error(f"Error type: {type(e).__name__}")
-        import traceback
-        logging.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error getting claims: %s", error_msg)
+        logger.error("Error type: %s", type(e).__name__, exc_info=True)
         
         # Return detailed error in development, generic in production
         import os
@@ -586,8 +657,8 @@ def get_claims():
 def submit_claim(claim_id):
     """Submit claim for processing"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_id = request.headers.get('X-User-ID', 'test_user')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_id = get_current_user_id('test_user')
         user_name = request.headers.get('X-User-Name', 'Test User')
         
         # Get existing claim
@@ -612,14 +683,15 @@ def submit_claim(claim_id):
             }), 400
         
         # Update claim status
+        now = datetime.utcnow()
         update_data = {
             'status': 'submitted',
-            'submitted_at': datetime.utcnow(),
+            'submitted_at': now,
             'submitted_by': user_id,
             'submitted_by_name': user_name,
             'updated_by': user_id,
             'updated_by_name': user_name,
-            'updated_at': datetime.utcnow()
+            'updated_at': now
         }
         
         claim_ref.update(update_data)
@@ -635,7 +707,7 @@ def submit_claim(claim_id):
         }), 200
         
     except Exception as e:
-        logging.error(f"Error submitting claim: {str(e)}")
+        logger.error("Error submitting claim: %s", e)
         return jsonify({
             'error': 'Internal server error',
             'message': 'Failed to submit claim'
@@ -720,7 +792,7 @@ def test_basic():
 def get_payers():
     """Get list of payers from database"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
+        hospital_id = get_current_hospital_id('HOSP_001')
         payer_type = request.args.get('type', '')
         
         db = get_db()
@@ -745,6 +817,9 @@ def get_payers():
         if payer_type:
             query = query.where('payer_type', '==', payer_type)
         
+        # Only fetch the fields the response uses
+        query = query.select(['name', 'payer_type', 'code'])
+        
         payers = []
         for doc in query.stream():
             payer_data = doc.to_dict()
@@ -758,7 +833,7 @@ def get_payers():
         return jsonify({'payers': payers}), 200
         
     except Exception as e:
-        logging.error(f"Error fetching payers: {str(e)}")
+        logger.error("Error fetching payers: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -781,14 +856,12 @@ def validate_claim_mandatory_fields(data: Dict[str, Any]) -> List[str]:
         errors.append('UHID is required and must be at least 3 characters')
     
     # Validate claim type
-    valid_claim_types = ['IP', 'OP', 'Day care']
-    if not data.get('claim_type') or data['claim_type'] not in valid_claim_types:
-        errors.append('Claim type is required and must be one of: ' + ', '.join(valid_claim_types))
+    if not data.get('claim_type') or data['claim_type'] not in VALID_CLAIM_TYPES:
+        errors.append('Claim type is required and must be one of: ' + ', '.join(VALID_CLAIM_TYPES))
     
     # Validate admission type
-    valid_admission_types = ['Planned', 'Emergency']
-    if not data.get('admission_type') or data['admission_type'] not in valid_admission_types:
-        errors.append('Admission type is required and must be one of: ' + ', '.join(valid_admission_types))
+    if not data.get('admission_type') or data['admission_type'] not in VALID_ADMISSION_TYPES:
+        errors.append('Admission type is required and must be one of: ' + ', '.join(VALID_ADMISSION_TYPES))
     
     return errors
 
@@ -799,14 +872,12 @@ def validate_claim_optional_fields(data: Dict[str, Any]) -> List[str]:
     
     # Validate claim type if provided
     if data.get('claim_type'):
-        valid_claim_types = ['IP', 'OP', 'Day care']
-        if data['claim_type'] not in valid_claim_types:
+        if data['claim_type'] not in VALID_CLAIM_TYPES:
             errors.append('Invalid claim type. Must be IP, OP, or Day care')
     
     # Validate admission type if provided
     if data.get('admission_type'):
-        valid_admission_types = ['Planned', 'Emergency']
-        if data['admission_type'] not in valid_admission_types:
+        if data['admission_type'] not in VALID_ADMISSION_TYPES:
             errors.append('Invalid admission type. Must be Planned or Emergency')
     
     # Validate email if provided
@@ -826,50 +897,42 @@ def validate_claim_optional_fields(data: Dict[str, Any]) -> List[str]:
     
     # Validate payer information
     if data.get('payer_type'):
-        valid_payer_types = ['TPA', 'Insurer', 'Corporate', 'Social schemes', 'Others']
-        if data['payer_type'] not in valid_payer_types:
+        if data['payer_type'] not in VALID_PAYER_TYPES:
             errors.append('Invalid payer type')
     
     # Validate ward type if provided
     if data.get('ward_type'):
-        valid_ward_types = ['Single room', 'Twin sharing', 'ICU', '3 or more beds']
-        if data['ward_type'] not in valid_ward_types:
+        if data['ward_type'] not in VALID_WARD_TYPES:
             errors.append('Invalid ward type. Must be Single room, Twin sharing, ICU, or 3 or more beds')
     
     # Validate daycare procedure if provided
     if data.get('daycare_procedure'):
-        valid_daycare_types = ['Dialysis', 'Chemotherapy', 'Radiotherapy', 'Other procedures']
-        if data['daycare_procedure'] not in valid_daycare_types:
+        if data['daycare_procedure'] not in VALID_DAYCARE_TYPES:
             errors.append('Invalid daycare procedure. Must be Dialysis, Chemotherapy, Radiotherapy, or Other procedures')
     
     # Validate nature of illness if provided
     if data.get('nature_of_illness'):
-        valid_nature_types = ['Disease', 'Injury']
-        if data['nature_of_illness'] not in valid_nature_types:
+        if data['nature_of_illness'] not in VALID_NATURE_TYPES:
             errors.append('Invalid nature of illness. Must be Disease or Injury')
     
     # Validate cause of injury if provided
     if data.get('cause_of_injury'):
-        valid_cause_types = ['Substance Abuse', 'Accident', 'Negligence']
-        if data['cause_of_injury'] not in valid_cause_types:
+        if data['cause_of_injury'] not in VALID_CAUSE_TYPES:
             errors.append('Invalid cause of injury. Must be Substance Abuse, Accident, or Negligence')
     
     # Validate proposed line of treatment if provided
     if data.get('proposed_line_of_treatment'):
-        valid_treatment_types = ['Medical Management', 'Surgical management', 'Intensive care', 'Investigation', 'Non-allopathic']
-        if data['proposed_line_of_treatment'] not in valid_treatment_types:
+        if data['proposed_line_of_treatment'] not in VALID_TREATMENT_TYPES:
             errors.append('Invalid proposed line of treatment. Must be Medical Management, Surgical management, Intensive care, Investigation, or Non-allopathic')
     
     # Validate route of drug administration if provided
     if data.get('route_of_drug_admin'):
-        valid_route_types = ['IV', 'Oral', 'Others']
-        if data['route_of_drug_admin'] not in valid_route_types:
+        if data['route_of_drug_admin'] not in VALID_ROUTE_TYPES:
             errors.append('Invalid route of drug administration. Must be IV, Oral, or Others')
     
     # Validate occupation if provided
     if data.get('occupation'):
-        valid_occupations = ['Service', 'Self employed', 'Retired', 'Business owner']
-        if data['occupation'] not in valid_occupations:
+        if data['occupation'] not in VALID_OCCUPATIONS:
             errors.append('Invalid occupation. Must be Service, Self employed, Retired, or Business owner')
     
     # Validate RTA file and FIR number (conditional validation)
@@ -904,8 +967,7 @@ def validate_claim_for_submission(claim_data: Dict[str, Any]) -> List[str]:
     errors = []
     
     # Check if all required fields are present
-    required_fields = ['gender', 'date_of_birth', 'address', 'city', 'state', 'pincode']
-    for field in required_fields:
+    for field in SUBMISSION_REQUIRED_FIELDS:
         if not claim_data.get(field):
             errors.append(f'{field.replace("_", " ").title()} is required for submission')
     
@@ -929,9 +991,7 @@ def validate_claim_for_submission(claim_data: Dict[str, Any]) -> List[str]:
 def check_patient_exists(uhid: str) -> bool:
     """Check if patient exists in patients collection"""
     try:
-        db = get_db()
-        patient_ref = db.collection('patients').document(uhid)
-        patient_doc = patient_ref.get()
+        patient_doc = get_document_cached('patients', uhid)
         return patient_doc.exists
     except Exception:
         return False
@@ -939,10 +999,13 @@ def check_patient_exists(uhid: str) -> bool:
 
 def get_hospital_info(hospital_id: str) -> dict:
     """Get hospital information by ID"""
+    cached = hospital_info_cache.get(hospital_id)
+    if cached is not None:
+        # Callers may add to the returned dict, so never hand out the cached one
+        return copy.deepcopy(cached)
+    
     try:
-        db = get_db()
-        hospital_ref = db.collection('hospitals').document(hospital_id)
-        hospital_doc = hospital_ref.get()
+        hospital_doc = get_document_cached('hospitals', hospital_id)
         
         if hospital_doc.exists:
             hospital_data = hospital_doc.to_dict()
@@ -953,15 +1016,17 @@ def get_hospital_info(hospital_id: str) -> dict:
                 hospital_data.get('name') or 
                 'Unknown Hospital'
             )
-            return {
+            hospital_info = {
                 'id': hospital_id,
                 'name': hospital_name,
                 **hospital_data
             }
+            hospital_info_cache.set(hospital_id, hospital_info)
+            return copy.deepcopy(hospital_info)
         else:
             return {'id': hospital_id, 'name': 'Unknown Hospital'}
     except Exception as e:
-        logging.error(f"Error fetching hospital info: {str(e)}")
+        logger.error("Error fetching hospital info: %s", e)
         return {'id': hospital_id, 'name': 'Unknown Hospital'}
 
 
@@ -979,14 +1044,14 @@ def log_claim_creation(claim_id: str, hospital_id: str, user_id: str, user_name:
             'ip_address': request.remote_addr,
             'user_agent': request.headers.get('User-Agent', ''),
             'timestamp': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow(),
+            'created_at': firestore.SERVER_TIMESTAMP,
             'is_active': True
         }
         
         db = get_db()
-        db.collection('audit_logs').add(audit_log)
+        run_in_background(db.collection('audit_logs').add, audit_log)
     except Exception as e:
-        logging.error(f"Error logging claim creation: {str(e)}")
+        logger.error("Error logging claim creation: %s", e)
 
 
 def log_claim_update(claim_id: str, hospital_id: str, user_id: str, user_name: str, update_data: Dict[str, Any]):
@@ -1003,14 +1068,14 @@ def log_claim_update(claim_id: str, hospital_id: str, user_id: str, user_name: s
             'ip_address': request.remote_addr,
             'user_agent': request.headers.get('User-Agent', ''),
             'timestamp': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow(),
+            'created_at': firestore.SERVER_TIMESTAMP,
             'is_active': True
         }
         
         db = get_db()
-        db.collection('audit_logs').add(audit_log)
+        run_in_background(db.collection('audit_logs').add, audit_log)
     except Exception as e:
-        logging.error(f"Error logging claim update: {str(e)}")
+        logger.error("Error logging claim update: %s", e)
 
 
 def log_claim_submission(claim_id: str, hospital_id: str, user_id: str, user_name: str):
@@ -1027,11 +1092,11 @@ def log_claim_submission(claim_id: str, hospital_id: str, user_id: str, user_nam
             'ip_address': request.remote_addr,
             'user_agent': request.headers.get('User-Agent', ''),
             'timestamp': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow(),
+            'created_at': firestore.SERVER_TIMESTAMP,
             'is_active': True
         }
         
         db = get_db()
-        db.collection('audit_logs').add(audit_log)
+        run_in_background(db.collection('audit_logs').add, audit_log)
     except Exception as e:
-        logging.error(f"Error logging claim submission: {str(e)}")
+        logger.error("Error logging claim submission: %s", e)
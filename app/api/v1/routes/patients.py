@@ -3,9 +3,11 @@ Patient routes for RCM SaaS Application
 """
 
 from flask import Blueprint, request, jsonify
+from firebase_admin import firestore
 from datetime import datetime, date
 import uuid
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, List, Optional
 import logging
 
@@ -13,24 +15,36 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from app.api.v1.middleware.auth_middleware import require_auth, require_permission
+from app.api.v1.middleware.auth_middleware import (
+    require_auth, require_permission, get_current_hospital_id, get_current_user_id
+)
 from app.api.v1.middleware.validation_middleware import validate_json
-from app.database.firebase_client import FirebaseClient
+from app.database.firebase_client import get_firebase_client
 from app.database.models.patient import Patient
 from app.utils.validators import validate_indian_phone_number, validate_email, validate_pincode
+from app.utils.background import run_in_background
 from app.utils.helpers import generate_patient_id, calculate_age
 
+logger = logging.getLogger(__name__)
+
 patients_bp = Blueprint('patients', __name__)
 
 # Firebase client will be initialized when needed
 firebase_client = None
 db = None
 
+# Shared HTTP session so calls to the external lookup APIs reuse pooled keep-alive connections
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32
+))
+
 def get_db():
     """Get Firestore database client"""
     global db, firebase_client
     if db is None:
-        firebase_client = FirebaseClient()
+        firebase_client = get_firebase_client()
         db = firebase_client.get_firestore_client()
     return db
 
@@ -42,8 +56,8 @@ def get_db():
 def create_patient():
     """Create a new patient with comprehensive validation"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')  # Default hospital for testing
-        user_id = request.headers.get('X-User-ID', 'test_user')
+        hospital_id = get_current_hospital_id('HOSP_001')  # Default hospital for testing
+        user_id = get_current_user_id('test_user')
         user_name = request.headers.get('X-User-Name', 'Test User')
         data = request.get_json()
         
@@ -150,7 +164,7 @@ def create_patient():
         }), 201
         
     except Exception as e:
-        logging.error(f"Error creating patient: {str(e)}")
+        logger.error("Error creating patient: %s", e)
         return jsonify({
             'error': 'Internal server error',
             'message': 'Failed to create patient'
@@ -178,7 +192,7 @@ def get_patient(uhid):
         }), 200
         
     except Exception as e:
-        logging.error(f"Error getting patient: {str(e)}")
+        logger.error("Error getting patient: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -214,7 +228,7 @@ def get_patient_by_mobile(mobile):
         }), 200
         
     except Exception as e:
-        logging.error(f"Error getting patient by mobile: {str(e)}")
+        logger.error("Error getting patient by mobile: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -224,8 +238,8 @@ def get_patient_by_mobile(mobile):
 def get_patients():
     """Get all patients with pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
         search = request.args.get('search', '')
         
         # Build query
@@ -239,16 +253,15 @@ def get_patients():
             # In production, consider using Algolia or Elasticsearch
             pass
         
-        # Get total count
-        total_docs = list(query.stream())
-        total_count = len(total_docs)
+        # Get total count with a server-side aggregation instead of streaming every document
+        total_count = query.count().get()[0][0].value
         
         # Apply pagination
         start_index = (page - 1) * per_page
         end_index = start_index + per_page
         
-        # Get paginated results
-        paginated_docs = total_docs[start_index:end_index]
+        # Get paginated results - only the requested page is fetched
+        paginated_docs = query.offset(start_index).limit(per_page).stream()
         
         patients = []
         for doc in paginated_docs:
@@ -271,7 +284,7 @@ def get_patients():
         }), 200
         
     except Exception as e:
-        logging.error(f"Error getting patients: {str(e)}")
+        logger.error("Error getting patients: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -281,7 +294,7 @@ def get_indian_states():
     """Get list of Indian states from external API"""
     try:
         # Using a free Indian states API
-        response = requests.get('https://api.countrystatecity.in/v1/countries/IN/states', 
+        response = http_session.get('https://api.countrystatecity.in/v1/countries/IN/states', 
                               headers={'X-CSCAPI-KEY': 'YOUR_API_KEY'}, timeout=10)
         
         if response.status_code == 200:
@@ -296,7 +309,7 @@ def get_indian_states():
             }), 200
             
     except Exception as e:
-        logging.error(f"Error fetching states: {str(e)}")
+        logger.error("Error fetching states: %s", e)
         # Return static list as fallback
         return jsonify({
             'states': get_static_indian_states()
@@ -309,7 +322,7 @@ def get_pincode_details(pincode):
     """Get state and city details from pincode"""
     try:
         # Using a free pincode API
-        response = requests.get(f'https://api.postalpincode.in/pincode/{pincode}', timeout=10)
+        response = http_session.get(f'https://api.postalpincode.in/pincode/{pincode}', timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -327,7 +340,7 @@ def get_pincode_details(pincode):
             return jsonify({'error': 'Pincode service unavailable'}), 503
             
     except Exception as e:
-        logging.error(f"Error fetching pincode details: {str(e)}")
+        logger.error("Error fetching pincode details: %s", e)
         return jsonify({'error': 'Pincode service error'}), 500
 
 
@@ -336,7 +349,7 @@ def get_pincode_details(pincode):
 def get_payers():
     """Get list of payers from database"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
+        hospital_id = get_current_hospital_id('HOSP_001')
         payer_type = request.args.get('type', '')
         
         # Query payers collection
@@ -347,6 +360,9 @@ def get_payers():
         if payer_type:
             query = query.where('payer_type', '==', payer_type)
         
+        # Only fetch the fields the response uses
+        query = query.select(['name', 'payer_type', 'code'])
+        
         payers = []
         for doc in query.stream():
             payer_data = doc.to_dict()
@@ -360,7 +376,7 @@ def get_payers():
         return jsonify({'payers': payers}), 200
         
     except Exception as e:
-        logging.error(f"Error fetching payers: {str(e)}")
+        logger.error("Error fetching payers: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -369,7 +385,7 @@ def get_payers():
 def get_corporates():
     """Get list of corporate clients from database"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
+        hospital_id = get_current_hospital_id('HOSP_001')
         
         # Query corporates collection
         db = get_db()
@@ -388,7 +404,7 @@ def get_corporates():
         return jsonify({'corporates': corporates}), 200
         
     except Exception as e:
-        logging.error(f"Error fetching corporates: {str(e)}")
+        logger.error("Error fetching corporates: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -513,14 +529,14 @@ def log_patient_creation(patient_id: str, hospital_id: str, user_id: str, user_n
             'ip_address': request.remote_addr,
             'user_agent': request.headers.get('User-Agent', ''),
             'timestamp': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow(),
+            'created_at': firestore.SERVER_TIMESTAMP,
             'is_active': True
         }
         
         db = get_db()
-        db.collection('audit_logs').add(audit_log)
+        run_in_background(db.collection('audit_logs').add, audit_log)
     except Exception as e:
-        logging.error(f"Error logging patient creation: {str(e)}")
+        logger.error("Error logging patient creation: %s", e)
 
 
 def get_static_indian_states() -> List[Dict[str, str]]:
@@ -3,21 +3,27 @@ Preauth Process routes for RCM SaaS Application
 Handles preauth status transitions and workflow management
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
+from firebase_admin import firestore
 from datetime import datetime
 import uuid
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from app.api.v1.middleware.auth_middleware import require_auth, require_permission
+from app.api.v1.middleware.auth_middleware import (
+    require_auth, require_permission, get_current_hospital_id, get_current_user_id, get_current_user_role
+)
 from app.api.v1.middleware.validation_middleware import validate_json
-from app.database.firebase_client import FirebaseClient
+from app.database.firebase_client import get_firebase_client
 from app.database.models.preauth_request import PreauthRequest
 from app.database.models.preauth_state import PreauthState
+from app.utils.helpers import generate_etag, etag_matches
+
+logger = logging.getLogger(__name__)
 
 preauthprocess_bp = Blueprint('preauthprocess', __name__)
 
@@ -29,7 +35,7 @@ def get_db():
     """Get Firestore database client"""
     global db, firebase_client
     if db is None:
-        firebase_client = FirebaseClient()
+        firebase_client = get_firebase_client()
         db = firebase_client.get_firestore_client()
     return db
 
@@ -50,6 +56,15 @@ STATUS_TRANSITIONS = {
 # Valid roles
 VALID_ROLES = ['preauth_executive', 'processor']
 
+# Optional preauth fields copied from the request when present
+PREAUTH_OPTIONAL_FIELDS = (
+    'policy_holder_name', 'policy_holder_relation', 'procedure_codes',
+    'treatment_date', 'admission_date', 'doctor_name', 'doctor_license',
+    'hospital_name', 'room_type', 'room_rent', 'consultation_fee',
+    'investigation_cost', 'medicine_cost', 'surgery_cost', 'other_costs',
+    'remarks', 'priority', 'is_urgent', 'urgent_reason'
+)
+
 def validate_status_transition(current_status: str, new_status: str, user_role: str) -> bool:
     """Validate if status transition is allowed for the given role"""
     if user_role not in VALID_ROLES:
@@ -78,6 +93,94 @@ def create_preauth_state_record(preauth_id: str, hospital_id: str, previous_stat
     )
     return state_record
 
+def stage_preauth_state_change(writer, db, preauth_doc_id: str, preauth_data: Dict[str, Any],
+                               state_record: PreauthState) -> None:
+    """Stage the preauth request and its state record on a batch or transaction"""
+    state_dict = state_record.to_dict()
+    state_dict['id'] = str(uuid.uuid4())
+    
+    writer.set(db.collection('preauth_requests').document(preauth_doc_id), preauth_data)
+    writer.set(db.collection('preauth_states').document(state_dict['id']), state_dict)
+
+def commit_preauth_state_change(db, preauth_doc_id: str, preauth_data: Dict[str, Any],
+                                state_record: PreauthState) -> None:
+    """Write the preauth request and its state record in a single batch"""
+    batch = db.batch()
+    stage_preauth_state_change(batch, db, preauth_doc_id, preauth_data, state_record)
+    batch.commit()
+
+@firestore.transactional
+def apply_status_transition(transaction, db, preauth_id: str, hospital_id: str, new_status: str,
+                            user_id: str, user_role: str, remarks: str,
+                            state_data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Validate and apply a status transition atomically; returns (response body, status code)"""
+    # Get current preauth request
+    preauth_query = db.collection('preauth_requests').where('preauth_id', '==', preauth_id).where('hospital_id', '==', hospital_id).limit(1)
+    preauth_docs = list(preauth_query.stream(transaction=transaction))
+    
+    if not preauth_docs:
+        return {
+            'success': False,
+            'message': 'Preauth request not found'
+        }, 404
+    
+    preauth_doc = preauth_docs[0]
+    preauth_data = preauth_doc.to_dict()
+    current_status = preauth_data.get('status', '')
+    
+    # Validate status transition
+    if not validate_status_transition(current_status, new_status, user_role):
+        allowed_transitions = STATUS_TRANSITIONS.get(user_role, {}).get(current_status, [])
+        return {
+            'success': False,
+            'message': f'Invalid status transition from {current_status} to {new_status}',
+            'current_status': current_status,
+            'user_role': user_role,
+            'allowed_transitions': allowed_transitions
+        }, 400
+    
+    # Update preauth request status
+    now = datetime.utcnow()
+    preauth_data['status'] = new_status
+    preauth_data['updated_at'] = now
+    preauth_data['updated_by'] = user_id
+    
+    # Add status-specific fields
+    if new_status == 'Preauth Approved':
+        preauth_data['approval_date'] = now
+        preauth_data['approval_reference'] = state_data.get('approval_reference', '')
+        preauth_data['approved_amount'] = float(state_data.get('approved_amount', preauth_data.get('requested_amount', 0)))
+    elif new_status in ['Preauth Denial', 'Discharge Denial']:
+        preauth_data['rejection_date'] = now
+        preauth_data['rejection_reason'] = remarks
+    
+    # Create state transition record
+    state_record = create_preauth_state_record(
+        preauth_id=preauth_id,
+        hospital_id=hospital_id,
+        previous_status=current_status,
+        new_status=new_status,
+        user_id=user_id,
+        remarks=remarks,
+        state_data=state_data
+    )
+    
+    # Save updated preauth request together with the transition record
+    stage_preauth_state_change(transaction, db, preauth_doc.id, preauth_data, state_record)
+    
+    return {
+        'success': True,
+        'message': f'Status updated from {current_status} to {new_status}',
+        'data': {
+            'preauth_id': preauth_id,
+            'previous_status': current_status,
+            'new_status': new_status,
+            'updated_by': user_id,
+            'updated_at': now.isoformat()
+        }
+    }, 200
+
+
 @preauthprocess_bp.route('/submit', methods=['POST'])
 # @require_auth
 # @require_permission('preauth:submit')
@@ -85,8 +188,8 @@ def create_preauth_state_record(preauth_id: str, hospital_id: str, previous_stat
 def submit_preauth():
     """Submit a new preauth request - starts with 'Preauth Registered' status"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_id = request.headers.get('X-User-ID', 'test_user')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_id = get_current_user_id('test_user')
         user_name = request.headers.get('X-User-Name', 'Test User')
         data = request.get_json()
         
@@ -108,15 +211,7 @@ def submit_preauth():
         }
         
         # Add optional fields if provided
-        optional_fields = [
-            'policy_holder_name', 'policy_holder_relation', 'procedure_codes',
-            'treatment_date', 'admission_date', 'doctor_name', 'doctor_license',
-            'hospital_name', 'room_type', 'room_rent', 'consultation_fee',
-            'investigation_cost', 'medicine_cost', 'surgery_cost', 'other_costs',
-            'remarks', 'priority', 'is_urgent', 'urgent_reason'
-        ]
-        
-        for field in optional_fields:
+        for field in PREAUTH_OPTIONAL_FIELDS:
             if field in data:
                 preauth_data[field] = data[field]
         
@@ -136,9 +231,6 @@ def submit_preauth():
         preauth_dict = preauth_request.to_dict()
         preauth_dict['id'] = str(uuid.uuid4())
         
-        # Save preauth request
-        db.collection('preauth_requests').document(preauth_dict['id']).set(preauth_dict)
-        
         # Create initial state record
         state_record = create_preauth_state_record(
             preauth_id=preauth_request.preauth_id,
@@ -150,9 +242,8 @@ def submit_preauth():
             state_data={'submission_data': preauth_data}
         )
         
-        state_dict = state_record.to_dict()
-        state_dict['id'] = str(uuid.uuid4())
-        db.collection('preauth_states').document(state_dict['id']).set(state_dict)
+        # Save preauth request together with its initial state
+        commit_preauth_state_change(db, preauth_dict['id'], preauth_dict, state_record)
         
         return jsonify({
             'success': True,
@@ -165,7 +256,7 @@ def submit_preauth():
         }), 201
         
     except Exception as e:
-        logging.error(f"Error submitting preauth: {str(e)}")
+        logger.error("Error submitting preauth: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to submit preauth request',
@@ -179,9 +270,9 @@ def submit_preauth():
 def update_preauth_status():
     """Update preauth status based on user role and current status"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_id = request.headers.get('X-User-ID', 'test_user')
-        user_role = request.headers.get('X-User-Role', 'preauth_executive')  # Default role
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_id = get_current_user_id('test_user')
+        user_role = get_current_user_role('preauth_executive')  # Default role
         data = request.get_json()
         
         preauth_id = data['preauth_id']
@@ -197,78 +288,16 @@ def update_preauth_status():
                 'valid_roles': VALID_ROLES
             }), 400
         
-        # Get current preauth request
+        # Read, validate and write in one transaction so concurrent transitions cannot both apply
         db = get_db()
-        preauth_query = db.collection('preauth_requests').where('preauth_id', '==', preauth_id).where('hospital_id', '==', hospital_id).limit(1)
-        preauth_docs = preauth_query.get()
-        
-        if not preauth_docs:
-            return jsonify({
-                'success': False,
-                'message': 'Preauth request not found'
-            }), 404
-        
-        preauth_doc = preauth_docs[0]
-        preauth_data = preauth_doc.to_dict()
-        current_status = preauth_data.get('status', '')
-        
-        # Validate status transition
-        if not validate_status_transition(current_status, new_status, user_role):
-            allowed_transitions = STATUS_TRANSITIONS.get(user_role, {}).get(current_status, [])
-            return jsonify({
-                'success': False,
-                'message': f'Invalid status transition from {current_status} to {new_status}',
-                'current_status': current_status,
-                'user_role': user_role,
-                'allowed_transitions': allowed_transitions
-            }), 400
-        
-        # Update preauth request status
-        preauth_data['status'] = new_status
-        preauth_data['updated_at'] = datetime.utcnow()
-        preauth_data['updated_by'] = user_id
-        
-        # Add status-specific fields
-        if new_status == 'Preauth Approved':
-            preauth_data['approval_date'] = datetime.utcnow()
-            preauth_data['approval_reference'] = state_data.get('approval_reference', '')
-            preauth_data['approved_amount'] = float(state_data.get('approved_amount', preauth_data.get('requested_amount', 0)))
-        elif new_status in ['Preauth Denial', 'Discharge Denial']:
-            preauth_data['rejection_date'] = datetime.utcnow()
-            preauth_data['rejection_reason'] = remarks
-        
-        # Save updated preauth request
-        db.collection('preauth_requests').document(preauth_doc.id).set(preauth_data)
-        
-        # Create state transition record
-        state_record = create_preauth_state_record(
-            preauth_id=preauth_id,
-            hospital_id=hospital_id,
-            previous_status=current_status,
-            new_status=new_status,
-            user_id=user_id,
-            remarks=remarks,
-            state_data=state_data
+        result, status_code = apply_status_transition(
+            db.transaction(), db, preauth_id, hospital_id, new_status,
+            user_id, user_role, remarks, state_data
         )
-        
-        state_dict = state_record.to_dict()
-        state_dict['id'] = str(uuid.uuid4())
-        db.collection('preauth_states').document(state_dict['id']).set(state_dict)
-        
-        return jsonify({
-            'success': True,
-            'message': f'Status updated from {current_status} to {new_status}',
-            'data': {
-                'preauth_id': preauth_id,
-                'previous_status': current_status,
-                'new_status': new_status,
-                'updated_by': user_id,
-                'updated_at': datetime.utcnow().isoformat()
-            }
-        }), 200
+        return jsonify(result), status_code
         
     except Exception as e:
-        logging.error(f"Error updating preauth status: {str(e)}")
+        logger.error("Error updating preauth status: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to update preauth status',
@@ -281,7 +310,7 @@ def update_preauth_status():
 def get_status_history(preauth_id):
     """Get status history for a preauth request"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
+        hospital_id = get_current_hospital_id('HOSP_001')
         
         db = get_db()
         
@@ -310,7 +339,7 @@ def get_status_history(preauth_id):
         }), 200
         
     except Exception as e:
-        logging.error(f"Error getting status history: {str(e)}")
+        logger.error("Error getting status history: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to get status history',
@@ -323,8 +352,8 @@ def get_status_history(preauth_id):
 def get_current_status(preauth_id):
     """Get current status and allowed transitions for a preauth request"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_role = request.headers.get('X-User-Role', 'preauth_executive')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_role = get_current_user_role('preauth_executive')
         
         db = get_db()
         
@@ -338,13 +367,20 @@ def get_current_status(preauth_id):
                 'message': 'Preauth request not found'
             }), 404
         
+        # Status pollers usually see an unchanged document - answer those with 304
+        etag = generate_etag(preauth_id, user_role, preauth_docs[0].update_time)
+        if etag_matches(request.if_none_match, etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            return response
+        
         preauth_data = preauth_docs[0].to_dict()
         current_status = preauth_data.get('status', '')
         
         # Get allowed transitions for current user role
         allowed_transitions = STATUS_TRANSITIONS.get(user_role, {}).get(current_status, [])
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': {
                 'preauth_id': preauth_id,
@@ -361,10 +397,13 @@ def get_current_status(preauth_id):
                     'submission_date': preauth_data.get('submission_date').isoformat() if preauth_data.get('submission_date') else None
                 }
             }
-        }), 200
+        })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, max-age=5'
+        return response, 200
         
     except Exception as e:
-        logging.error(f"Error getting current status: {str(e)}")
+        logger.error("Error getting current status: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to get current status',
@@ -377,8 +416,8 @@ def get_current_status(preauth_id):
 def list_preauth_requests():
     """List preauth requests with filtering options"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_role = request.headers.get('X-User-Role', 'preauth_executive')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_role = get_current_user_role('preauth_executive')
         
         # Get query parameters
         status_filter = request.args.get('status')
@@ -431,7 +470,7 @@ def list_preauth_requests():
         }), 200
         
     except Exception as e:
-        logging.error(f"Error listing preauth requests: {str(e)}")
+        logger.error("Error listing preauth requests: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to list preauth requests',
@@ -445,8 +484,8 @@ def list_preauth_requests():
 def submit_discharge():
     """Submit discharge information for a preauth request"""
     try:
-        hospital_id = request.headers.get('X-Hospital-ID', 'HOSP_001')
-        user_id = request.headers.get('X-User-ID', 'test_user')
+        hospital_id = get_current_hospital_id('HOSP_001')
+        user_id = get_current_user_id('test_user')
         data = request.get_json()
         
         preauth_id = data['preauth_id']
@@ -476,17 +515,15 @@ def submit_discharge():
             }), 400
         
         # Update preauth with discharge data
+        now = datetime.utcnow()
         preauth_data['status'] = 'Discharge Submitted'
-        preauth_data['discharge_date'] = discharge_data.get('discharge_date', datetime.utcnow())
+        preauth_data['discharge_date'] = discharge_data.get('discharge_date', now)
         preauth_data['actual_cost'] = discharge_data.get('actual_cost', 0.0)
         preauth_data['discharge_summary'] = discharge_data.get('discharge_summary', '')
         preauth_data['final_diagnosis'] = discharge_data.get('final_diagnosis', '')
-        preauth_data['updated_at'] = datetime.utcnow()
+        preauth_data['updated_at'] = now
         preauth_data['updated_by'] = user_id
         
-        # Save updated preauth request
-        db.collection('preauth_requests').document(preauth_doc.id).set(preauth_data)
-        
         # Create state transition record
         state_record = create_preauth_state_record(
             preauth_id=preauth_id,
@@ -498,9 +535,8 @@ def submit_discharge():
             state_data={'discharge_data': discharge_data}
         )
         
-        state_dict = state_record.to_dict()
-        state_dict['id'] = str(uuid.uuid4())
-        db.collection('preauth_states').document(state_dict['id']).set(state_dict)
+        # Save updated preauth request together with the transition record
+        commit_preauth_state_change(db, preauth_doc.id, preauth_data, state_record)
         
         return jsonify({
             'success': True,
@@ -513,7 +549,7 @@ def submit_discharge():
         }), 200
         
     except Exception as e:
-        logging.error(f"Error submitting discharge: {str(e)}")
+        logger.error("Error submitting discharge: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to submit discharge information',
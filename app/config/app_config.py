@@ -27,8 +27,17 @@ class AppConfig:
     
     # File Upload Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    MAX_FILES_PER_REQUEST = 5
+    MAX_REQUEST_SIZE = MAX_FILES_PER_REQUEST * MAX_CONTENT_LENGTH  # Multi-document uploads
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx'}
     
+    # Response Compression Configuration
+    COMPRESS_MIMETYPES = ['application/json', 'text/html']
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_BR_LEVEL = 5
+    COMPRESS_LEVEL = 6  # gzip
+    COMPRESS_MIN_SIZE = 500  # bytes; smaller bodies are not worth compressing
+    
     # Security Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
@@ -60,7 +69,14 @@ class AppConfig:
             'DEFAULT_PAGE_SIZE': cls.DEFAULT_PAGE_SIZE,
             'MAX_PAGE_SIZE': cls.MAX_PAGE_SIZE,
             'MAX_CONTENT_LENGTH': cls.MAX_CONTENT_LENGTH,
+            'MAX_FILES_PER_REQUEST': cls.MAX_FILES_PER_REQUEST,
+            'MAX_REQUEST_SIZE': cls.MAX_REQUEST_SIZE,
             'ALLOWED_EXTENSIONS': cls.ALLOWED_EXTENSIONS,
+            'COMPRESS_MIMETYPES': cls.COMPRESS_MIMETYPES,
+            'COMPRESS_ALGORITHM': cls.COMPRESS_ALGORITHM,
+            'COMPRESS_BR_LEVEL': cls.COMPRESS_BR_LEVEL,
+            'COMPRESS_LEVEL': cls.COMPRESS_LEVEL,
+            'COMPRESS_MIN_SIZE': cls.COMPRESS_MIN_SIZE,
             'JWT_SECRET_KEY': cls.JWT_SECRET_KEY,
             'JWT_ACCESS_TOKEN_EXPIRES': cls.JWT_ACCESS_TOKEN_EXPIRES,
             'JWT_REFRESH_TOKEN_EXPIRES': cls.JWT_REFRESH_TOKEN_EXPIRES,
@@ -50,6 +50,12 @@ class DatabaseConfig:
             {'fields': ['hospital_id', 'role', 'is_active']},
             {'fields': ['email', 'hospital_id']},
             {'fields': ['user_id', 'hospital_id']}
+        ],
+        'doctors': [
+            {'fields': ['hospital_id', 'is_active', 'speciality_id']}
+        ],
+        'payers': [
+            {'fields': ['hospital_id', 'is_active', 'payer_type']}
         ]
     }
     
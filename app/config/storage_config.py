@@ -56,6 +56,9 @@ class StorageConfig:
         'thumbnail_size': (200, 200)
     }
     
+    # Signed URL expiries are rounded up to this window so URLs stay cacheable
+    SIGNED_URL_WINDOW_MINUTES = 30
+    
     # Security Rules for Storage
     STORAGE_RULES = {
         'patients': {
@@ -2,8 +2,8 @@
 Database module for RCM SaaS Application
 """
 
-from .firebase_client import FirebaseClient
+from .firebase_client import FirebaseClient, get_firebase_client
 from .firestore_client import FirestoreClient
 from .models import *
 
-__all__ = ['FirebaseClient', 'FirestoreClient']
+__all__ = ['FirebaseClient', 'FirestoreClient', 'get_firebase_client']
@@ -6,9 +6,12 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 from typing import Optional, Dict, Any
 import logging
+import threading
 
 from app.config import FirebaseConfig
 
+logger = logging.getLogger(__name__)
+
 
 class FirebaseClient:
     """Firebase client for database and storage operations"""
@@ -33,7 +36,7 @@ class FirebaseClient:
                         'storageBucket': FirebaseConfig.STORAGE_BUCKET
                     })
                 else:
-                    logging.warning("No Firebase service account credentials found")
+                    logger.warning("No Firebase service account credentials found")
                     return
             else:
                 self.app = firebase_admin.get_app()
@@ -45,10 +48,10 @@ class FirebaseClient:
             from firebase_admin import storage as firebase_storage
             self.bucket = firebase_storage.bucket()
             
-            logging.info("Firebase initialized successfully")
+            logger.info("Firebase initialized successfully")
             
         except Exception as e:
-            logging.error(f"Failed to initialize Firebase: {str(e)}")
+            logger.error("Failed to initialize Firebase: %s", e)
             # Don't raise the error during import, just log it
             pass
     
@@ -87,3 +90,18 @@ class FirebaseClient:
                 'status': 'unhealthy',
                 'error': str(e)
             }
+
+
+# Process-wide client shared by routes and storage helpers
+_firebase_client: Optional[FirebaseClient] = None
+_firebase_client_lock = threading.Lock()
+
+
+def get_firebase_client() -> FirebaseClient:
+    """Get the shared Firebase client, initializing it on first use"""
+    global _firebase_client
+    if _firebase_client is None:
+        with _firebase_client_lock:
+            if _firebase_client is None:
+                _firebase_client = FirebaseClient()
+    return _firebase_client
@@ -9,6 +9,8 @@ from datetime import datetime
 
 from app.config import DatabaseConfig
 
+logger = logging.getLogger(__name__)
+
 
 class FirestoreClient:
     """Firestore client for database operations"""
@@ -31,7 +33,7 @@ class FirestoreClient:
                 return doc_ref[1].id
                 
         except Exception as e:
-            logging.error(f"Error creating document in {collection}: {str(e)}")
+            logger.error("Error creating document in %s: %s", collection, e)
             raise
     
     def get_document(self, collection: str, document_id: str) -> Optional[Dict[str, Any]]:
@@ -45,7 +47,7 @@ class FirestoreClient:
             return None
             
         except Exception as e:
-            logging.error(f"Error getting document from {collection}: {str(e)}")
+            logger.error("Error getting document from %s: %s", collection, e)
             raise
     
     def update_document(self, collection: str, document_id: str, data: Dict[str, Any]) -> bool:
@@ -56,7 +58,7 @@ class FirestoreClient:
             return True
             
         except Exception as e:
-            logging.error(f"Error updating document in {collection}: {str(e)}")
+            logger.error("Error updating document in %s: %s", collection, e)
             raise
     
     def delete_document(self, collection: str, document_id: str) -> bool:
@@ -67,7 +69,7 @@ class FirestoreClient:
             return True
             
         except Exception as e:
-            logging.error(f"Error deleting document from {collection}: {str(e)}")
+            logger.error("Error deleting document from %s: %s", collection, e)
             raise
     
     def query_collection(self, collection: str, filters: List[tuple] = None, 
@@ -93,7 +95,7 @@ class FirestoreClient:
             return [doc.to_dict() for doc in docs]
             
         except Exception as e:
-            logging.error(f"Error querying collection {collection}: {str(e)}")
+            logger.error("Error querying collection %s: %s", collection, e)
             raise
     
     def batch_write(self, operations: List[Dict[str, Any]]) -> bool:
@@ -120,5 +122,5 @@ class FirestoreClient:
             return True
             
         except Exception as e:
-            logging.error(f"Error in batch write: {str(e)}")
+            logger.error("Error in batch write: %s", e)
             raise
@@ -3,7 +3,9 @@ Main application entry point for RCM SaaS Application
 """
 
 from flask import Flask
+from flask.logging import default_handler
 from flask_cors import CORS
+from flask_compress import Compress
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import logging
@@ -11,9 +13,11 @@ import os
 from datetime import datetime
 
 from app.config import AppConfig, FirebaseConfig, StorageConfig
-from app.database.firebase_client import FirebaseClient
+from app.database.firebase_client import get_firebase_client
 from app.storage.firebase_storage import FirebaseStorageClient
+from app.utils.json_provider import OrjsonProvider, orjson_available
 from app.api.v1.routes import v1_bp
+from app.api.v1.middleware.logging_middleware import register_request_id, start_queue_logging
 
 
 def create_app(config_name: str = None) -> Flask:
@@ -35,6 +39,13 @@ def create_app(config_name: str = None) -> Flask:
         # Fallback to development config if specific config not found
         app.config.from_object('app.config.settings.DevelopmentConfig')
     
+    # Serialize JSON responses with orjson when it is installed
+    if orjson_available():
+        app.json = OrjsonProvider(app)
+    
+    # Reject oversized request bodies before they are read into Python
+    app.config['MAX_CONTENT_LENGTH'] = AppConfig.MAX_REQUEST_SIZE
+    
     # Initialize extensions
     cors_origins = app.config.get('CORS_ORIGINS', '*')
     if isinstance(cors_origins, str):
@@ -51,11 +62,17 @@ def create_app(config_name: str = None) -> Flask:
             "X-Requested-With",
             "X-Hospital-ID",
             "X-User-ID",
-            "X-User-Name"
+            "X-User-Name",
+            "X-Request-ID"
         ],
-        expose_headers=["Content-Type", "Authorization"]
+        expose_headers=["Content-Type", "Authorization", "X-Request-ID"]
     )
     
+    # Compress JSON responses, preferring Brotli when the client accepts it
+    for key in ('COMPRESS_MIMETYPES', 'COMPRESS_ALGORITHM', 'COMPRESS_BR_LEVEL', 'COMPRESS_LEVEL', 'COMPRESS_MIN_SIZE'):
+        app.config[key] = getattr(AppConfig, key)
+    Compress(app)
+    
     # Initialize rate limiter with proper storage
     limiter = Limiter(
         key_func=get_remote_address,
@@ -65,7 +82,7 @@ def create_app(config_name: str = None) -> Flask:
     limiter.init_app(app)
     
     # Initialize Firebase
-    firebase_client = FirebaseClient()
+    firebase_client = get_firebase_client()
     app.firebase_client = firebase_client
     
     # Initialize Firebase Storage (lazy initialization)
@@ -76,6 +93,7 @@ def create_app(config_name: str = None) -> Flask:
     
     # Configure logging
     configure_logging(app)
+    register_request_id(app)
     
     # Add CORS error handler for 404s
     @app.errorhandler(404)
@@ -137,6 +155,14 @@ def create_app(config_name: str = None) -> Flask:
 def configure_logging(app: Flask) -> None:
     """Configure application logging"""
     
+    log_level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO').upper())
+    
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    ))
+    handlers = [console_handler]
+    
     if not app.debug and not app.testing:
         # Production logging
         if not os.path.exists('logs'):
@@ -147,16 +173,27 @@ def configure_logging(app: Flask) -> None:
             '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
         ))
         file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('RCM SaaS Application startup')
+        handlers.append(file_handler)
+    
+    # One queue on the root logger serves module loggers and app.logger alike;
+    # Flask's own stderr handler would duplicate the console output
+    start_queue_logging(handlers, log_level)
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(log_level)
+    app.logger.info('RCM SaaS Application startup')
+
 
+# App instance for Gunicorn (`app.main:app`), created on first access so that
+# importing create_app (as wsgi.py and run.py do) doesn't build an extra app
+def __getattr__(name):
+    if name == 'app':
+        app = create_app()
+        globals()['app'] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create app instance for Gunicorn
-app = create_app()
 
 if __name__ == '__main__':
     # Only run in debug mode if explicitly set
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-    app.run(debug=debug_mode, host='0.0.0.0', port=5000)
+    create_app().run(debug=debug_mode, host='0.0.0.0', port=5000)
@@ -3,14 +3,18 @@ Firebase Storage utility for RCM SaaS Application
 """
 
 import os
+import time
 import uuid
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, BinaryIO
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import firebase_admin
-from firebase_admin import storage as firebase_storage
 import logging
 
 from app.config import FirebaseConfig, StorageConfig
+from app.database.firebase_client import get_firebase_client
+
+logger = logging.getLogger(__name__)
 
 
 class FirebaseStorageClient:
@@ -19,12 +23,15 @@ class FirebaseStorageClient:
     def __init__(self):
         self.bucket_name = StorageConfig.BUCKET_NAME
         try:
-            # Get the bucket using Firebase Admin SDK
-            self.bucket = firebase_storage.bucket()
-            logging.info("Firebase Storage initialized successfully")
+            # Reuse the bucket handle held by the shared Firebase client
+            self.bucket = get_firebase_client().get_storage_bucket()
+            logger.info("Firebase Storage initialized successfully")
         except Exception as e:
-            logging.error(f"Failed to initialize Firebase Storage: {str(e)}")
+            logger.error("Failed to initialize Firebase Storage: %s", e)
             self.bucket = None
+        
+        # Signed URLs keyed by (storage_path, rounded expiry)
+        self._signed_url_for = lru_cache(maxsize=1024)(self._sign_storage_path)
     
     def upload_patient_document(self, 
                               hospital_id: str, 
@@ -42,14 +49,13 @@ class FirebaseStorageClient:
         # Create storage path
         storage_path = f"patients/{hospital_id}/{patient_id}/documents/{document_type}/{unique_filename}"
         
-        # Upload file
+        # Set metadata before upload so it is sent with the object instead of a separate patch()
+        content_type = self._get_content_type(file_extension)
         blob = self.bucket.blob(storage_path)
-        blob.upload_from_file(file_data, content_type=self._get_content_type(file_extension))
+        blob.metadata = StorageConfig.get_storage_metadata(hospital_id, user_id, document_type)
         
-        # Set metadata
-        metadata = StorageConfig.get_storage_metadata(hospital_id, user_id, document_type)
-        blob.metadata = metadata
-        blob.patch()
+        # Upload file
+        self._upload_file(blob, file_data, content_type)
         
         # Generate public URL (signed URL for security)
         url = self._generate_signed_url(blob)
@@ -61,7 +67,7 @@ class FirebaseStorageClient:
             'url': url,
             'storage_path': storage_path,
             'size': blob.size,
-            'content_type': blob.content_type,
+            'content_type': content_type,
             'uploaded_at': datetime.utcnow().isoformat(),
             'uploaded_by': user_id
         }
@@ -77,19 +83,18 @@ class FirebaseStorageClient:
         
         # Generate unique filename
         file_extension = os.path.splitext(filename)[1]
-        unique_filename = f"{document_type}_{preauth_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_extension}"
+        unique_filename = f"{document_type}_{preauth_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
         
         # Create storage path
         storage_path = f"claims/{hospital_id}/{preauth_id}/documents/{unique_filename}"
         
-        # Upload file
+        # Set metadata before upload so it is sent with the object instead of a separate patch()
+        content_type = self._get_content_type(file_extension)
         blob = self.bucket.blob(storage_path)
-        blob.upload_from_file(file_data, content_type=self._get_content_type(file_extension))
+        blob.metadata = StorageConfig.get_storage_metadata(hospital_id, user_id, document_type)
         
-        # Set metadata
-        metadata = StorageConfig.get_storage_metadata(hospital_id, user_id, document_type)
-        blob.metadata = metadata
-        blob.patch()
+        # Upload file
+        self._upload_file(blob, file_data, content_type)
         
         # Generate public URL (signed URL for security)
         url = self._generate_signed_url(blob)
@@ -101,7 +106,7 @@ class FirebaseStorageClient:
             'url': url,
             'storage_path': storage_path,
             'size': blob.size,
-            'content_type': blob.content_type,
+            'content_type': content_type,
             'uploaded_at': datetime.utcnow().isoformat(),
             'uploaded_by': user_id
         }
@@ -121,14 +126,13 @@ class FirebaseStorageClient:
         # Create storage path
         storage_path = f"documents/{hospital_id}/{document_type}/{unique_filename}"
         
-        # Upload file
+        # Set metadata before upload so it is sent with the object instead of a separate patch()
+        content_type = self._get_content_type(file_extension)
         blob = self.bucket.blob(storage_path)
-        blob.upload_from_file(file_data, content_type=self._get_content_type(file_extension))
+        blob.metadata = StorageConfig.get_storage_metadata(hospital_id, user_id, document_type)
         
-        # Set metadata
-        metadata = StorageConfig.get_storage_metadata(hospital_id, user_id, document_type)
-        blob.metadata = metadata
-        blob.patch()
+        # Upload file
+        self._upload_file(blob, file_data, content_type)
         
         # Generate public URL (signed URL for security)
         url = self._generate_signed_url(blob)
@@ -140,7 +144,7 @@ class FirebaseStorageClient:
             'url': url,
             'storage_path': storage_path,
             'size': blob.size,
-            'content_type': blob.content_type,
+            'content_type': content_type,
             'uploaded_at': datetime.utcnow().isoformat(),
             'uploaded_by': user_id
         }
@@ -152,23 +156,18 @@ class FirebaseStorageClient:
             blob.delete()
             return True
         except NotFound:
-            logging.warning(f"Document not found: {storage_path}")
+            logger.warning("Document not found: %s", storage_path)
             return False
         except Exception as e:
-            logging.error(f"Error deleting document {storage_path}: {str(e)}")
+            logger.error("Error deleting document %s: %s", storage_path, e)
             return False
     
     def get_document_url(self, storage_path: str, expiration_hours: int = 24) -> str:
         """Get signed URL for document access"""
         try:
-            blob = self.bucket.blob(storage_path)
-            url = blob.generate_signed_url(
-                expiration=datetime.utcnow() + timedelta(hours=expiration_hours),
-                method='GET'
-            )
-            return url
+            return self._signed_url_for(storage_path, self._signed_url_expiration(expiration_hours))
         except Exception as e:
-            logging.error(f"Error generating signed URL for {storage_path}: {str(e)}")
+            logger.error("Error generating signed URL for %s: %s", storage_path, e)
             return ""
     
     def list_patient_documents(self, hospital_id: str, patient_id: str) -> List[Dict[str, Any]]:
@@ -197,7 +196,7 @@ class FirebaseStorageClient:
             # For now, we'll return the original path
             return storage_path
         except Exception as e:
-            logging.error(f"Error creating thumbnail for {storage_path}: {str(e)}")
+            logger.error("Error creating thumbnail for %s: %s", storage_path, e)
             return None
     
     def cleanup_temp_files(self, hospital_id: str, older_than_hours: int = 24) -> int:
@@ -216,7 +215,7 @@ class FirebaseStorageClient:
             
             return deleted_count
         except Exception as e:
-            logging.error(f"Error cleaning up temp files: {str(e)}")
+            logger.error("Error cleaning up temp files: %s", e)
             return 0
     
     def get_storage_usage(self, hospital_id: str) -> Dict[str, Any]:
@@ -250,7 +249,7 @@ class FirebaseStorageClient:
                 'hospital_id': hospital_id
             }
         except Exception as e:
-            logging.error(f"Error getting storage usage: {str(e)}")
+            logger.error("Error getting storage usage: %s", e)
             return {
                 'total_size_bytes': 0,
                 'total_size_mb': 0,
@@ -278,9 +277,18 @@ class FirebaseStorageClient:
             
             return documents
         except Exception as e:
-            logging.error(f"Error listing documents with prefix {prefix}: {str(e)}")
+            logger.error("Error listing documents with prefix %s: %s", prefix, e)
             return []
     
+    def _upload_file(self, blob, file_data: BinaryIO, content_type: str) -> None:
+        """Upload a stream with its size known up front"""
+        # Size the stream without reading it so the client can pick multipart vs resumable;
+        # rewind=True below seeks back to the start before uploading
+        file_data.seek(0, os.SEEK_END)
+        size = file_data.tell()
+        
+        blob.upload_from_file(file_data, size=size, content_type=content_type, rewind=True)
+    
     def _get_content_type(self, file_extension: str) -> str:
         """Get content type based on file extension"""
         content_types = {
@@ -298,14 +306,22 @@ class FirebaseStorageClient:
     def _generate_signed_url(self, blob, expiration_hours: int = 24) -> str:
         """Generate signed URL for blob access"""
         try:
-            return blob.generate_signed_url(
-                expiration=datetime.utcnow() + timedelta(hours=expiration_hours),
-                method='GET'
-            )
+            return self._signed_url_for(blob.name, self._signed_url_expiration(expiration_hours))
         except Exception as e:
-            logging.error(f"Error generating signed URL: {str(e)}")
+            logger.error("Error generating signed URL: %s", e)
             return ""
     
+    def _sign_storage_path(self, storage_path: str, expires_at: datetime) -> str:
+        """Sign a GET URL for the given storage path"""
+        blob = self.bucket.blob(storage_path)
+        return blob.generate_signed_url(expiration=expires_at, method='GET')
+    
+    def _signed_url_expiration(self, expiration_hours: int) -> datetime:
+        """Round the expiry up to the next window boundary so repeat requests get the same URL"""
+        window = StorageConfig.SIGNED_URL_WINDOW_MINUTES * 60
+        window_end = (int(time.time()) // window + 1) * window
+        return datetime.fromtimestamp(window_end + expiration_hours * 3600, tz=timezone.utc)
+    
     def health_check(self) -> Dict[str, Any]:
         """Check storage connection health"""
         try:
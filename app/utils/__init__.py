@@ -8,6 +8,9 @@ from .formatters import *
 from .encryption import *
 from .email_utils import *
 from .file_utils import *
+from .cache import *
+from .background import *
+from .json_provider import *
 
 __all__ = [
     'validators',
@@ -15,5 +18,8 @@ __all__ = [
     'formatters',
     'encryption',
     'email_utils',
-    'file_utils'
+    'file_utils',
+    'cache',
+    'background',
+    'json_provider'
 ]
@@ -0,0 +1,32 @@
+"""
+Background task utilities for RCM SaaS Application
+"""
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+# Shared pool for fire-and-forget work that must not delay the HTTP response
+_background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='background')
+
+
+def _log_background_failure(future: Future) -> None:
+    """Log exceptions raised by background tasks, which would otherwise be lost"""
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background task failed: %s", exc)
+
+
+def run_in_background(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Run func on the shared background pool without waiting for its result.
+    
+    Callers must capture any request-bound data (headers, remote address)
+    before submitting, since the request context is not available on the
+    worker thread.
+    """
+    future = _background_executor.submit(func, *args, **kwargs)
+    future.add_done_callback(_log_background_failure)
+    return future
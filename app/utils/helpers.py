@@ -5,6 +5,7 @@ Helper utilities for RCM SaaS Application
 import uuid
 import hashlib
 import secrets
+import time
 from datetime import datetime, timedelta, date
 from typing import Any, Dict, List, Optional, Union
 import re
@@ -89,6 +90,36 @@ def generate_reference_number(prefix: str = 'REF') -> str:
     return f"{prefix}_{timestamp}_{random_part}"
 
 
+def generate_etag(*parts: Any) -> str:
+    """Generate an ETag from the values that determine a response"""
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def etag_matches(if_none_match: Any, etag: str) -> bool:
+    """Check a request's If-None-Match against etag.
+    
+    Flask-Compress rewrites the ETag of compressed responses to
+    ``W/"<etag>:<algorithm>"``, so the suffix is ignored when comparing.
+    """
+    if if_none_match.star_tag:
+        return True
+    return any(tag.split(':', 1)[0] == etag for tag in if_none_match.as_set(include_weak=True))
+
+
+_utc_iso_cache = (0, '')
+
+
+def utc_now_iso() -> str:
+    """Get the current UTC time as an ISO 8601 string, reused within the same millisecond"""
+    global _utc_iso_cache
+    now_ms = time.time_ns() // 1_000_000
+    cached_ms, cached_iso = _utc_iso_cache
+    if now_ms != cached_ms:
+        cached_iso = datetime.utcfromtimestamp(now_ms / 1000).isoformat(timespec='milliseconds')
+        _utc_iso_cache = (now_ms, cached_iso)
+    return cached_iso
+
+
 def hash_password(password: str) -> str:
     """Hash password using SHA-256"""
     salt = secrets.token_hex(16)
@@ -0,0 +1,84 @@
+"""
+JSON provider for RCM SaaS Application responses
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def orjson_available() -> bool:
+    """Check whether orjson is installed"""
+    return orjson is not None
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize the types orjson leaves to us the same way Flask's default provider does"""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_json(obj: Any) -> str:
+    """Serialize obj to a compact JSON string, using orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+    return json.dumps(obj)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson while keeping Flask's output format.
+    
+    Dates are passed through to the default hook so they keep Flask's HTTP
+    date format, keys stay sorted, and anything orjson rejects (e.g. integers
+    wider than 64 bits) falls back to the standard library encoder.
+    """
+    
+    _options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+    
+    def _dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        option = self._options
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_orjson_default, option=option)
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Callers asking for specific json.dumps options get the standard encoder
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._dumps_bytes(obj).decode('utf-8')
+        except (orjson.JSONEncodeError, TypeError):
+            return super().dumps(obj)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._dumps_bytes(obj, indent=indent) + b'\n'
+        except (orjson.JSONEncodeError, TypeError):
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
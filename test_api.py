@@ -64,6 +64,36 @@ def test_api():
         print(f"Response: {json.dumps(response.json(), indent=2)}")
     except Exception as e:
         print(f"Error: {e}")
+    
+    # Test 6: Conditional GET on a compressed claim response
+    print("\n6. Testing Claim Revalidation (If-None-Match with Accept-Encoding: br):")
+    try:
+        claims = requests.get(f"{base_url}/api/v1/claims/", headers=headers, timeout=10).json().get('claims', [])
+        if claims:
+            claim_url = f"{base_url}/api/v1/claims/{claims[0]['claim_id']}"
+            first = requests.get(claim_url, headers={**headers, "Accept-Encoding": "br"}, timeout=10)
+            etag = first.headers.get('ETag')
+            print(f"ETag: {etag}")
+            second = requests.get(claim_url, headers={**headers, "Accept-Encoding": "br", "If-None-Match": etag}, timeout=10)
+            print(f"Status: {second.status_code} (expected 304)")
+            assert second.status_code == 304
+        else:
+            print("No claims to revalidate")
+    except Exception as e:
+        print(f"Error: {e}")
+    
+    # Test 7: Conditional GET on the compressed API documentation
+    print("\n7. Testing API Documentation Revalidation (If-None-Match with Accept-Encoding: br):")
+    try:
+        docs_url = f"{base_url}/api/v1/"
+        first = requests.get(docs_url, headers={"Accept-Encoding": "br"}, timeout=10)
+        etag = first.headers.get('ETag')
+        print(f"ETag: {etag}")
+        second = requests.get(docs_url, headers={"Accept-Encoding": "br", "If-None-Match": etag}, timeout=10)
+        print(f"Status: {second.status_code} (expected 304)")
+        assert second.status_code == 304
+    except Exception as e:
+        print(f"Error: {e}")
 
 if __name__ == "__main__":
     test_api()